@@ -0,0 +1,243 @@
+"""
+Benchmarks of the simulation hot paths with fixed seeds.
+Run from the repository root (constants.py must exist):
+    python -m benchmarks.bench [--quick] [--only ships,localize,paths,generate] [--output file.json] [--compare old.json]
+Results go to benchmarks/results/<timestamp>.json unless --output is given.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def timings(samples: list) -> dict:
+    """Summary of a list of durations in seconds"""
+    return {
+        'runs': len(samples),
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples),
+    }
+
+
+def measure(fn, repeat: int, seed: int = 0) -> dict:
+    """Times fn() `repeat` times, reseeding random with seed + run before each call"""
+    samples = []
+    for run in range(repeat):
+        random.seed(seed + run)
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return timings(samples)
+
+
+def benchShips(sizes, repeat: int) -> dict:
+    from graph.graph import ManhattanGraph
+
+    results = dict()
+    for n in sizes:
+        def create():
+            ManhattanGraph(screen=None, n=n).create_manhattan_graph()
+
+        def generate():
+            graph = ManhattanGraph(screen=None, n=n)
+            graph.create_manhattan_graph()
+            while graph.step < 4:
+                graph.proceed(is_use_ip_cells=False)
+
+        results[f"create_manhattan_graph[n={n}]"] = measure(create, repeat)
+        results[f"generate_ship[n={n}]"] = measure(generate, repeat)
+    return results
+
+
+def _episodeGraph(bot_type: int):
+    import constants as cnt
+    from graph.graph import getGraph
+
+    cnt.CURRENT_PART = bot_type
+    graph = getGraph(None, isUseIpCells=True)
+    graph.proceed(is_use_ip_cells=True)  # Loads the predefined ship, moves to step 4
+    return graph
+
+
+def benchLocalize(bot_types, episodes: int, first_steps: int) -> dict:
+    import constants as cnt
+    from gateways.robotgateway import LocalizerGateway
+
+    results = dict()
+    for bot_type in bot_types:
+        # Single localize() calls over the first steps of each episode, where beliefs are largest
+        step_samples = []
+        for episode in range(episodes):
+            random.seed(episode)
+            graph = _episodeGraph(bot_type)
+            localizer = LocalizerGateway(graph, None, bot_type)
+            for _ in range(first_steps):
+                start = time.perf_counter()
+                localizer.localize()
+                step_samples.append(time.perf_counter() - start)
+                if graph.game_over:
+                    break
+        results[f"localize_step[bot={bot_type}]"] = timings(step_samples)
+
+        # Full episodes, capped like data generation
+        samples, steps = [], []
+        for episode in range(episodes):
+            random.seed(episode)
+            graph = _episodeGraph(bot_type)
+            start = time.perf_counter()
+            while not graph.game_over and graph.t < cnt.MAX_MOVES_CAP:
+                graph.proceed(is_use_ip_cells=True)
+            samples.append(time.perf_counter() - start)
+            steps.append(graph.t)
+        summary = timings(samples)
+        summary['steps'] = steps
+        summary['seconds_per_step'] = sum(samples) / max(sum(steps), 1)
+        results[f"episode[bot={bot_type}]"] = summary
+    return results
+
+
+def benchPaths(pairs: int, repeat: int) -> dict:
+    from graph.astar import astar
+    from graph.djikstras import compatibleGraph, djikstras, getPathFromATOB
+    from graph.graph import getGraph
+
+    graph = getGraph(None, isUseIpCells=True)
+    graph.proceed(is_use_ip_cells=True)
+    comp_graph = compatibleGraph(graph.Ship, list(graph.Ship.adjacency()))
+    # astar expects networkx style adjacency: node -> neighbour -> attributes
+    weighted = {node: {nb['node']: {'weight': nb['dist']} for nb in neighbours}
+                for node, neighbours in comp_graph.items()}
+
+    def manhattan(a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    rng = random.Random(0)
+    nodes = sorted(comp_graph)
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(pairs)]
+    queries = [(a, b) for a, b in queries if a != b]
+
+    # Both must agree on path lengths, otherwise the timings compare different work
+    for a, b in queries:
+        if len(getPathFromATOB(djikstras(comp_graph, a), a, b)) + 1 != len(astar(weighted, a, b, manhattan)):
+            raise AssertionError(f"djikstras and astar disagree on {a} -> {b}")
+
+    def runDjikstras():
+        for a, b in queries:
+            getPathFromATOB(djikstras(comp_graph, a), a, b)
+
+    def runAstar():
+        for a, b in queries:
+            astar(weighted, a, b, manhattan)
+
+    results = {'djikstras': measure(runDjikstras, repeat), 'astar': measure(runAstar, repeat)}
+    for name in results:
+        results[name]['queries'] = len(queries)
+        results[name]['seconds_per_query'] = results[name]['median'] / len(queries)
+    return results
+
+
+def benchGenerate(bot_type: int, trials_per_size: int) -> dict:
+    import constants as cnt
+    import data.report as report
+    from data.store import ExperimentStore
+
+    cnt.CURRENT_PART = bot_type
+    with tempfile.TemporaryDirectory() as root:
+        report.STORE_PATH = root  # Never mixes benchmark episodes into the real store
+        start = time.perf_counter()
+        report.DataService.generate_data(rounds=0, trials_per_size=trials_per_size)
+        seconds = time.perf_counter() - start
+        episodes = len(ExperimentStore(root))
+    return {f"generate_data[bot={bot_type}]": {
+        'episodes': episodes,
+        'seconds': seconds,
+        'episodes_per_second': episodes / seconds,
+    }}
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=BENCH_DIR).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+    }
+
+
+def compare(results: dict, baseline_path: str):
+    """Prints the median (or throughput) ratio of every benchmark also present in the baseline"""
+    with open(baseline_path) as file:
+        baseline = json.load(file)['results']
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if 'episodes_per_second' in result:
+            print(f"{name:40s} {result['episodes_per_second'] / old['episodes_per_second']:6.2f}x throughput")
+        else:
+            print(f"{name:40s} {old['median'] / result['median']:6.2f}x faster")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions, for a smoke run")
+    parser.add_argument("--only", default="ships,localize,paths,generate")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else \
+        os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    # Model and data paths are relative to a directory one level below the root, like main/
+    os.chdir(BENCH_DIR)
+    selected = set(args.only.split(","))
+    repeat = 3 if args.quick else 10
+    episodes = 2 if args.quick else 5
+
+    results = dict()
+    if "ships" in selected:
+        results.update(benchShips([30, 60] if args.quick else [30, 60, 100], repeat))
+    if "localize" in selected:
+        results.update(benchLocalize([1, 2, 3, 4], episodes, first_steps=20))
+    if "paths" in selected:
+        results.update(benchPaths(pairs=50 if args.quick else 200, repeat=repeat))
+    if "generate" in selected:
+        results.update(benchGenerate(bot_type=1, trials_per_size=1 if args.quick else 10))
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({'meta': metadata(args), 'results': results}, file, indent=1)
+
+    for name, result in results.items():
+        if 'episodes_per_second' in result:
+            print(f"{name:40s} {result['episodes_per_second']:10.1f} episodes/s")
+        else:
+            print(f"{name:40s} {result['median'] * 1e3:10.3f} ms (median of {result['runs']})")
+    print(f"Results written to {output}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
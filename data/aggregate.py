@@ -0,0 +1,112 @@
+import numpy as np
+
+
+class StepAggregate:
+    """
+    Per-|L| statistics of steps to localize, built in one pass over chunks of (L_size, steps) arrays.
+    Count, mean and variance are merged chunk by chunk (Chan et al.), quantiles come from a
+    histogram of the integer step counts kept only for the L sizes seen, each as long as its own largest step count.
+    Memory depends on the L sizes present and their step ranges, not the number of rows.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.means = np.zeros(0, dtype=np.float64)
+        self.m2 = np.zeros(0, dtype=np.float64)  # Sum of squared deviations from the mean
+        self.histograms = dict()  # L_size -> episodes per step count
+
+    @staticmethod
+    def fromChunks(chunks):
+        aggregate = StepAggregate()
+        for sizes, steps in chunks:
+            aggregate.update(sizes, steps)
+        return aggregate
+
+    def _grow(self, sizes: int):
+        old_sizes = len(self.counts)
+        if sizes <= old_sizes:
+            return
+        self.counts = np.pad(self.counts, (0, sizes - old_sizes))
+        self.means = np.pad(self.means, (0, sizes - old_sizes))
+        self.m2 = np.pad(self.m2, (0, sizes - old_sizes))
+
+    def _addToHistograms(self, sizes, steps):
+        order = np.argsort(sizes, kind='stable')
+        sizes, steps = sizes[order], steps[order]
+        starts = np.flatnonzero(np.concatenate(([True], sizes[1:] != sizes[:-1])))
+        for L_size, group in zip(sizes[starts].tolist(), np.split(steps, starts[1:])):
+            counts = np.bincount(group)
+            known = self.histograms.get(L_size)
+            if known is not None:
+                if len(known) < len(counts):
+                    known, counts = counts, known
+                known[:len(counts)] += counts
+                counts = known
+            self.histograms[L_size] = counts
+
+    def update(self, sizes, steps):
+        sizes = np.asarray(sizes, dtype=np.int64).ravel()
+        steps = np.asarray(steps, dtype=np.int64).ravel()
+        if len(sizes) == 0:
+            return
+        if sizes.min() < 0 or steps.min() < 0:
+            raise ValueError("L sizes and steps must be non-negative")
+        self._grow(int(sizes.max()) + 1)
+        n_sizes = len(self.counts)
+
+        counts = np.bincount(sizes, minlength=n_sizes)
+        sums = np.bincount(sizes, weights=steps, minlength=n_sizes)
+        seen = counts > 0
+        means = np.zeros(n_sizes)
+        means[seen] = sums[seen] / counts[seen]
+        m2 = np.bincount(sizes, weights=(steps - means[sizes]) ** 2, minlength=n_sizes)
+
+        # Merge the chunk's moments into the running ones
+        total = self.counts + counts
+        delta = means - self.means
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, counts / total, 0.0)
+        self.means += delta * weight
+        self.m2 += m2 + delta ** 2 * self.counts * weight
+        self.counts = total
+
+        self._addToHistograms(sizes, steps)
+
+    def sizes(self):
+        """L sizes with at least one episode, ascending"""
+        return np.flatnonzero(self.counts)
+
+    def count(self):
+        return self.counts[self.sizes()]
+
+    def mean(self):
+        return self.means[self.sizes()]
+
+    def variance(self, ddof: int = 0):
+        sizes = self.sizes()
+        return self.m2[sizes] / np.maximum(self.counts[sizes] - ddof, 1)
+
+    def std(self, ddof: int = 0):
+        return np.sqrt(self.variance(ddof))
+
+    def quantile(self, q):
+        """
+        Step quantile(s) per L size, shape (len(sizes()),) for a scalar q, else (len(q), len(sizes())).
+        Uses the lower value at a split (numpy's 'inverted_cdf' method).
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        sizes = self.sizes()
+        result = np.zeros((len(qs), len(sizes)), dtype=np.int64)
+        for i, L_size in enumerate(sizes.tolist()):
+            cumulative = np.cumsum(self.histograms[L_size])
+            # First step count whose cumulative share reaches q
+            targets = np.maximum(np.ceil(qs * cumulative[-1]), 1)
+            result[:, i] = np.searchsorted(cumulative, targets)
+        return result[0] if np.ndim(q) == 0 else result
+
+    def summary(self, quantiles=(0.1, 0.5, 0.9)) -> dict:
+        """Column arrays (L_size, count, mean, std, q<..>) with one entry per L size"""
+        columns = {'L_size': self.sizes(), 'count': self.count(), 'mean': self.mean(), 'std': self.std()}
+        for q, values in zip(quantiles, self.quantile(list(quantiles))):
+            columns[f"q{int(round(q * 100))}"] = values
+        return columns
@@ -1,24 +1,18 @@
-import multiprocessing
-import random
-from collections import defaultdict
-from tqdm import tqdm
-import matplotlib.pyplot as plt
-import pandas as pd
 import constants as cnt
-from game.auto_game import auto_game
-from graph.sample.sample1 import currently_open_1
+from parts.localizer3 import DEFAULT_MODEL_PATH
+from game.batch_game import batch_game
+from game.shared_ship import SharedShip, mergeAnalysisForWorkers
+from data.scheduler import GenerationScheduler
+from data.store import ExperimentStore, STATUS_LOCALIZED, iterSizesAndSteps
+from data.aggregate import StepAggregate
+from parts.policycache import PolicyCache, policyCachePath
+from graph.mergeability import mergeAnalysisFor, synchronizes
+from graph.shiplibrary import defaultShip, defaultShipSize, shipHash
+from graph.transitions import tableForLayout
+import helpers.profiler as profiler
 
-
-def worker(args):
-    """Standalone worker function for parallel processing"""
-    try:
-        open_cells, L_size = args
-        L = random.sample(open_cells, L_size)
-        g = auto_game(bot_type=cnt.CURRENT_PART, isUseIpCells=False, open_cells=L)
-        return f"{L_size},{g.t}\n"
-    except Exception as e:
-        print(f"Worker error: {e}")
-        return ""
+STORE_PATH = "../data/experiments"
+PART3_GENERATORS = ('part3', 'part3-batched')  # Store generators of generate_data / generate_data_batched runs
 
 
 class DataService:
@@ -30,46 +24,102 @@ class DataService:
         """
         self.points = points
         self.isGenerateData = isGenerateData
+        import pandas as pd
+
         self.df = pd.DataFrame(columns=['timesteps', 'alpha', 'bot_number', 'is_rat_moving'])
 
     @staticmethod
-    def generate_data(rounds = 0):
+    def generate_data(rounds = 0, min_size=20, max_size=100, trials_per_size=10):
+        from tqdm import tqdm
+
+        open_cells, dead_ends = defaultShip()
+        n = defaultShipSize()
+        config = {'generator': 'part3', 'ship_hash': shipHash(n, open_cells), 'strategy': cnt.CURRENT_PART,
+                  'grid_size': n, 'min_size': min_size, 'max_size': max_size,
+                  'trials_per_size': trials_per_size, 'rounds': rounds}
+        if getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1:
+            config['lookahead_depth'] = cnt.LOOKAHEAD_DEPTH  # Planned episodes never resume a greedy run
+        if getattr(cnt, 'POLICY_CACHE', False):
+            config['policy_cache'] = True  # Replayed episodes are not samples of the plain strategy
+        # Picks up an interrupted run with the same config, otherwise starts a new one
+        run = ExperimentStore(STORE_PATH).resumeOrCreate(config)
+        done = run.completedSeeds()
+
+        # Hopeless start sets are known before any worker starts, the workers record them without simulating
+        table = tableForLayout(n, open_cells)
+        if synchronizes(table) is False:
+            print(f"Warning: {mergeAnalysisFor(table).unmergeable_pairs} cell pairs of this ship can never be "
+                  f"told apart, start sets holding one are stored as unlocalizable")
+
+        # Launch one pool for all rounds, strategy 3 workers load their model once up front
+        model_paths = [DEFAULT_MODEL_PATH] if cnt.CURRENT_PART == 3 else []
+        policy, policy_path = None, None
+        if getattr(cnt, 'POLICY_CACHE', False):
+            policy_path = policyCachePath(shipHash(n, open_cells), cnt.CURRENT_PART)
+            policy = PolicyCache.load(policy_path)
+        analysis = mergeAnalysisForWorkers(table, cnt.CURRENT_PART)  # Built once here, workers map it
+        with SharedShip(n, open_cells, dead_ends, synchronizes(table), analysis) as ship, \
+                GenerationScheduler(ship.descriptor, model_paths, policy_cache=policy,
+                                    policy_path=policy_path) as scheduler:
+            for round_no in range(rounds + 1):
+                # Prepare argument list: one (seed, L_size) entry per trial, the ship itself is shared once per worker
+                params = []
+                for L_size in range(min_size, max_size + 1):
+                    for _ in range(trials_per_size):
+                        seed = run.base_seed + round_no * (max_size - min_size + 1) * trials_per_size + len(params)
+                        params.append((seed, L_size))
+                params = [task for task in params if task[0] not in done]
+
+                with tqdm(total=len(params), desc=f"Generating part3 data (round {round_no + 1}/{rounds + 1})") as bar:
+                    scheduler.run(params, run, bar)
+                if policy is not None:
+                    policy.save(policy_path)  # Workers of the next run start from what this round learned
+        run.finish()
+        if profiler.ENABLED:
+            print(f"Profile written to {profiler.export()}")
+
+    @staticmethod
+    def generate_data_batched(rounds=0):
+        """Same records as generate_data, but every episode of a round runs in lockstep in this process"""
         min_size = 20
         max_size = 100
         trials_per_size = 10
 
-        open_cells = list(currently_open_1)
-        file = open("../data/data.txt", "a+")
-        # Prepare argument list: one entry per trial
-        params = []
-        for L_size in range(min_size, max_size + 1):
-            for _ in range(trials_per_size):
-                params.append((open_cells, L_size))
-
-        # Launch pool
-        with multiprocessing.Pool() as pool, file:
-            for result in tqdm(pool.imap(worker, params),
-                               total=len(params),
-                               desc="Generating part3 data"):
-                if result:
-                    file.write(result)
-                    file.flush()
-
-        if rounds > 0:
-            DataService.generate_data(rounds-1)
+        open_cells, _ = defaultShip()
+        n = defaultShipSize()
+        config = {'generator': 'part3-batched', 'ship_hash': shipHash(n, open_cells), 'strategy': cnt.CURRENT_PART,
+                  'grid_size': n, 'min_size': min_size, 'max_size': max_size,
+                  'trials_per_size': trials_per_size, 'rounds': rounds}
+        run = ExperimentStore(STORE_PATH).resumeOrCreate(config)
+        done = run.completedSeeds()
+
+        L_sizes = [L_size for L_size in range(min_size, max_size + 1) for _ in range(trials_per_size)]
+        for round_no in range(rounds + 1):
+            # A round is committed as a whole, its episodes are numbered from the round's seed
+            round_seed = run.base_seed + round_no * len(L_sizes)
+            if round_seed in done:
+                continue
+            results = batch_game(bot_type=cnt.CURRENT_PART, L_sizes=L_sizes, isUseIpCells=True, seed=round_seed)
+            run.write([(round_seed + i, L_size, steps, status) for i, (L_size, steps, status) in enumerate(results)])
+            skipped = sum(1 for *_, status in results if status != STATUS_LOCALIZED)
+            if skipped:
+                print(f"{skipped} episodes did not localize within {cnt.MAX_MOVES_CAP} moves or were unlocalizable")
+        run.finish()
 
     @staticmethod
     def plot_data():
-        data = defaultdict(list)
-        file = open("../data/data.txt", "r")
-        for line in file:
-            parts = line.strip().split(",")
-            L_size = int(parts[0])
-            steps = int(parts[1])
-            data[L_size].append(steps)
-
-        L_sizes = sorted(data.keys())
-        avg_steps = [sum(data[k]) / len(data[k]) for k in L_sizes]
+        import matplotlib.pyplot as plt
+
+        # One pass over the store shards, memory stays bounded however many episodes there are
+        aggregate = StepAggregate.fromChunks(
+            iterSizesAndSteps(None, ExperimentStore(STORE_PATH), strategy=cnt.CURRENT_PART,
+                              generator=PART3_GENERATORS))
+        if len(aggregate.sizes()) == 0:
+            # Nothing generated into the store yet, fall back to the legacy text results
+            aggregate = StepAggregate.fromChunks(iterSizesAndSteps("../data/data.txt"))
+
+        L_sizes = aggregate.sizes()
+        avg_steps = aggregate.mean()
 
         plt.figure(figsize=(10, 6))
         plt.plot(L_sizes, avg_steps, marker="o")
@@ -0,0 +1,118 @@
+import multiprocessing
+import queue
+import time
+from game.shared_ship import checkWorker, initEpisodeWorker, runEpisode, takeLearnedPolicy
+import helpers.profiler as profiler
+
+
+def runChunk(chunk):
+    """
+    Worker side: runs a list of (seed, L_size) tasks, returns (seed, L_size, steps, status) records, the time spent,
+    when profiling the worker's stats since its previous chunk, and the policy cache entries it learned meanwhile
+    """
+    checkWorker()  # Fails the whole run, not every task, when the worker could not start
+    start = time.perf_counter()
+    records = []
+    for seed, L_size in chunk:
+        try:
+            records.append((seed,) + runEpisode((seed, L_size)))
+        except Exception as e:
+            print(f"Worker error: {e}")
+    stats = None
+    if profiler.ENABLED:
+        stats = profiler.snapshot()
+        profiler.reset()
+    return records, len(chunk), time.perf_counter() - start, stats, takeLearnedPolicy()
+
+
+class GenerationScheduler:
+    """
+    Runs (seed, L_size) episode tasks on one pool that lives across rounds.
+    Tasks are sent in chunks sized so each takes about target_chunk_seconds, based on the
+    per-task time observed so far, results are handed to the sink in blocks and progress moves once per chunk.
+    With a policy_cache, every worker starts from the cache saved at its path and what they learn is merged into it.
+    """
+
+    def __init__(self, descriptor, model_paths=(), processes=None, target_chunk_seconds: float = 0.5,
+                 flush_lines: int = 1000, flush_seconds: float = 10.0, max_chunk: int = 512,
+                 policy_cache=None, policy_path: str = None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.policy_cache = policy_cache
+        self.pool = multiprocessing.Pool(self.processes, initializer=initEpisodeWorker,
+                                         initargs=(descriptor, model_paths, policy_path))
+        self.target_chunk_seconds = target_chunk_seconds
+        self.flush_lines = flush_lines
+        self.flush_seconds = flush_seconds
+        self.max_chunk = max_chunk
+        self.task_seconds = None  # Running mean of the time per task, None until the first chunk returns
+
+    def _chunkSize(self, remaining: int) -> int:
+        if self.task_seconds is None:
+            return 1  # Probe with single tasks until there is a timing
+        size = int(self.target_chunk_seconds / max(self.task_seconds, 1e-6))
+        # Keep every worker busy towards the end of a round
+        fair_share = max(1, remaining // (2 * self.processes))
+        return max(1, min(size, self.max_chunk, fair_share))
+
+    def run(self, tasks: list, sink, progress=None):
+        """
+        Runs all tasks and hands their records to sink.write(records) in blocks of flush_lines
+        (or whatever arrived within flush_seconds), e.g. an ExperimentRun. Returns the number of records written.
+        """
+        done = queue.Queue()
+        in_flight = 0
+        position = 0
+        buffer = []
+        written = 0
+        last_flush = time.perf_counter()
+
+        def failed(error):
+            done.put(error)
+
+        while position < len(tasks) or in_flight:
+            # Two chunks per worker in flight, so nobody idles while results are handled
+            while position < len(tasks) and in_flight < 2 * self.processes:
+                size = self._chunkSize(len(tasks) - position)
+                chunk = tasks[position:position + size]
+                position += size
+                self.pool.apply_async(runChunk, (chunk,), callback=done.put, error_callback=failed)
+                in_flight += 1
+
+            result = done.get()
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+            records, count, seconds, stats, learned = result
+            if stats is not None:
+                profiler.merge(stats)  # Worker stats add up in this process, ready for profiler.export()
+            if learned and self.policy_cache is not None:
+                self.policy_cache.merge(learned)
+            per_task = seconds / max(count, 1)
+            self.task_seconds = per_task if self.task_seconds is None else 0.8 * self.task_seconds + 0.2 * per_task
+
+            buffer.extend(records)
+            if len(buffer) >= self.flush_lines or time.perf_counter() - last_flush >= self.flush_seconds:
+                sink.write(buffer)
+                written += len(buffer)
+                buffer = []
+                last_flush = time.perf_counter()
+            if progress is not None:
+                progress.update(count)
+
+        if buffer:
+            sink.write(buffer)
+            written += len(buffer)
+        return written
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.pool.terminate()
@@ -0,0 +1,210 @@
+import itertools
+import json
+import os
+import random
+import time
+import numpy as np
+
+# Episode outcome codes stored in the `status` column
+STATUS_LOCALIZED = 0
+STATUS_STEP_CAP = 1  # Stopped at cnt.MAX_MOVES_CAP without localizing
+STATUS_TIME_CAP = 2  # Stopped at cnt.EPISODE_TIME_LIMIT seconds without localizing
+STATUS_CYCLE = 3  # Stopped because one belief recurred more than cnt.CYCLE_LIMIT times
+STATUS_UNLOCALIZABLE = 4  # Not run, the start set holds cells no action sequence can tell apart
+STATUS_NAMES = {STATUS_LOCALIZED: "localized", STATUS_STEP_CAP: "step_cap", STATUS_TIME_CAP: "time_cap",
+                STATUS_CYCLE: "cycle", STATUS_UNLOCALIZABLE: "unlocalizable"}
+
+# Config keys of runs whose episodes are not plain samples of their strategy. runs() leaves those runs out
+# unless the filter names the key, so readers of a strategy's data never mix them in by accident.
+VARIANT_KEYS = ('policy_cache', 'lookahead_depth')
+
+# Per-row columns of every shard, run level metadata lives in the manifest and the partition path
+COLUMNS = {
+    'seed': np.int64,
+    'L_size': np.int32,
+    'steps': np.int32,
+    'status': np.uint8,
+}
+
+
+def _atomicWrite(path: str, write):
+    """Writes through a temporary file and renames it over `path`, readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class ExperimentRun:
+    """One resumable generation run. Records are appended as NPZ shards listed in the store manifest."""
+
+    def __init__(self, store, run_id: str):
+        self.store = store
+        self.run_id = run_id
+
+    @property
+    def meta(self) -> dict:
+        return self.store.manifest['runs'][self.run_id]
+
+    @property
+    def base_seed(self) -> int:
+        return self.meta['base_seed']
+
+    def directory(self) -> str:
+        meta = self.meta
+        return os.path.join(self.store.root, f"ship={meta['ship_hash']}", f"strategy={meta['strategy']}",
+                            f"run={self.run_id}")
+
+    def completedSeeds(self) -> set:
+        seeds = self.store.load(columns=['seed'], run_id=self.run_id)['seed']
+        return set(seeds.tolist())
+
+    def write(self, records):
+        """Appends (seed, L_size, steps[, status]) records as a new shard and checkpoints the manifest"""
+        if not records:
+            return
+        columns = {name: np.empty(len(records), dtype=dtype) for name, dtype in COLUMNS.items()}
+        for i, record in enumerate(records):
+            columns['seed'][i], columns['L_size'][i], columns['steps'][i] = record[:3]
+            columns['status'][i] = record[3] if len(record) > 3 else STATUS_LOCALIZED
+
+        os.makedirs(self.directory(), exist_ok=True)
+        shard = f"shard-{len(self.meta['shards']):05d}.npz"
+        _atomicWrite(os.path.join(self.directory(), shard), lambda file: np.savez(file, **columns))
+        self.meta['shards'].append({'file': shard, 'rows': len(records)})
+        self.meta['rows'] += len(records)
+        self.store.saveManifest()
+
+    def finish(self):
+        self.meta['complete'] = True
+        self.store.saveManifest()
+
+
+class ExperimentStore:
+    """
+    Columnar store of generated episodes under `root`:
+        manifest.json                                  runs, their metadata and committed shards
+        ship=<hash>/strategy=<k>/run=<id>/shard-*.npz  one array per column
+    A shard only counts once the manifest lists it, so an interrupted run resumes from its last checkpoint.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
+        else:
+            self.manifest = {'version': 1, 'runs': dict()}
+
+    def saveManifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        data = json.dumps(self.manifest, indent=1, sort_keys=True).encode()
+        _atomicWrite(self.manifest_path, lambda file: file.write(data))
+
+    def resumeOrCreate(self, config: dict) -> ExperimentRun:
+        """
+        Returns the unfinished run with exactly this config if there is one, otherwise starts a new run.
+        config must hold at least ship_hash, strategy and grid_size, all values JSON serializable.
+        """
+        for run_id, meta in self.manifest['runs'].items():
+            if not meta['complete'] and meta['config'] == config:
+                return ExperimentRun(self, run_id)
+
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{len(self.manifest['runs']):04d}"
+        self.manifest['runs'][run_id] = {
+            'config': config,
+            'ship_hash': config['ship_hash'],
+            'strategy': config['strategy'],
+            'grid_size': config['grid_size'],
+            'base_seed': random.randrange(2 ** 31),
+            'created': time.time(),
+            'complete': False,
+            'rows': 0,
+            'shards': [],
+        }
+        self.saveManifest()
+        return ExperimentRun(self, run_id)
+
+    def runs(self, ship_hash=None, strategy=None, run_id=None, **config) -> list:
+        """
+        Runs matching every filter, extra keyword filters are matched against the run config (tuples match any).
+        Runs with a VARIANT_KEYS entry in their config only match when that key is filtered on (or by run_id).
+        """
+        if run_id is None:
+            config = {**{key: None for key in VARIANT_KEYS}, **config}
+        selected = []
+        for rid, meta in self.manifest['runs'].items():
+            if run_id is not None and rid != run_id:
+                continue
+            if ship_hash is not None and meta['ship_hash'] != ship_hash:
+                continue
+            if strategy is not None and meta['strategy'] != strategy:
+                continue
+            if any(meta['config'].get(key) not in (value if isinstance(value, tuple) else (value,))
+                   for key, value in config.items()):
+                continue
+            selected.append(ExperimentRun(self, rid))
+        return selected
+
+    def iterShards(self, columns=None, ship_hash=None, strategy=None, run_id=None, **config):
+        """Yields one dict of column arrays per committed shard, only the requested columns are read"""
+        columns = list(columns) if columns else list(COLUMNS)
+        for run in self.runs(ship_hash, strategy, run_id, **config):
+            directory = run.directory()
+            for shard in run.meta['shards']:
+                with np.load(os.path.join(directory, shard['file'])) as data:
+                    yield {name: data[name] for name in columns}
+
+    def load(self, columns=None, ship_hash=None, strategy=None, run_id=None, **config) -> dict:
+        """Concatenated column arrays of every matching shard"""
+        columns = list(columns) if columns else list(COLUMNS)
+        parts = {name: [] for name in columns}
+        for shard in self.iterShards(columns, ship_hash, strategy, run_id, **config):
+            for name in columns:
+                parts[name].append(shard[name])
+        return {name: np.concatenate(arrays) if arrays else np.empty(0, dtype=COLUMNS[name])
+                for name, arrays in parts.items()}
+
+    def __len__(self):
+        return sum(meta['rows'] for meta in self.manifest['runs'].values())
+
+
+def _readTextChunks(text_path: str, chunk_rows: int):
+    """Yields (L_size, steps) arrays of a "L_size,steps" text file, chunk_rows lines at a time"""
+    with open(text_path) as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                return
+            data = np.loadtxt(lines, delimiter=",", dtype=np.int64, ndmin=2)
+            if len(data):
+                yield data[:, 0], data[:, 1]
+
+
+def iterSizesAndSteps(text_path: str = None, store: ExperimentStore = None, chunk_rows: int = 1_000_000,
+                      **filters):
+    """
+    Streams (L_size, steps) arrays of localized episodes from a legacy "L_size,steps" text file and / or a store,
+    one bounded chunk at a time (a text chunk or a store shard). Either source may be missing,
+    filters are passed to ExperimentStore.iterShards.
+    """
+    if text_path and os.path.exists(text_path):
+        yield from _readTextChunks(text_path, chunk_rows)
+    if store is not None:
+        for shard in store.iterShards(['L_size', 'steps', 'status'], **filters):
+            localized = shard['status'] == STATUS_LOCALIZED
+            yield shard['L_size'][localized].astype(np.int64), shard['steps'][localized].astype(np.int64)
+
+
+def loadSizesAndSteps(text_path: str = None, store: ExperimentStore = None, **filters):
+    """All of iterSizesAndSteps concatenated into two arrays, use it only when every row is needed (e.g. training)"""
+    sizes, steps = [], []
+    for chunk_sizes, chunk_steps in iterSizesAndSteps(text_path, store, **filters):
+        sizes.append(chunk_sizes)
+        steps.append(chunk_steps)
+    if not sizes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(sizes), np.concatenate(steps)
@@ -1,14 +1,29 @@
 from graph.graph import getGraph
-from graph.sample.sample1 import currently_open_1, dead_ends_1
+from graph.shiplibrary import defaultShip
+import helpers.profiler as profiler
+from game.governor import runGoverned
+from data.store import STATUS_UNLOCALIZABLE
+from graph.mergeability import synchronizes
 
 # A function that runs a simulation without screen / ui elements
-def auto_game(bot_type, isUseIpCells: bool = True, open_cells = []):
+def auto_game(bot_type, isUseIpCells: bool = True, open_cells = [], ship = None):
     print(f"Autogame started part type: {bot_type}")
-    graph = getGraph(None, isUseIpCells)
+    graph = getGraph(None, isUseIpCells, ship)
     if isUseIpCells:
-        graph.currently_open = open_cells if open_cells else currently_open_1
-        graph.dead_ends_1 = dead_ends_1
+        currently_open, dead_ends = defaultShip()
+        graph.currently_open = open_cells if open_cells else currently_open
+        graph.dead_ends_1 = dead_ends
 
-    while not graph.game_over:
+    # Build the ship first, the localizer starts from every open cell which only works on a synchronizing ship
+    while graph.step < 4 and not graph.game_over:
         graph.proceed(is_use_ip_cells=isUseIpCells)
+    if synchronizes(graph.getTransitionTable()) is False:
+        print("Ship cannot be localized from every cell: some cell pairs never merge")
+        graph.status = STATUS_UNLOCALIZABLE
+        graph.game_over = True
+        return graph
+
+    # Stops at the step cap, the time limit or a belief cycle, graph.status tells which
+    runGoverned(graph, isUseIpCells)
+    profiler.endEpisode()
     return graph
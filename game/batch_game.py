@@ -0,0 +1,168 @@
+import numpy as np
+import constants as cnt
+from graph.graph import getGraph
+from data.store import STATUS_LOCALIZED, STATUS_STEP_CAP, STATUS_UNLOCALIZABLE
+from graph.mergeability import synchronizes
+
+
+class BatchSimulator:
+    """
+    Runs many independent localization episodes on one ship in lockstep.
+    Start beliefs come stacked as an (episodes, open cells) boolean tensor and every step
+    applies the greedy Localizer1 / Localizer2 action rule to all episodes at once.
+    """
+
+    def __init__(self, table, bot_type: int, max_steps: int = cnt.MAX_MOVES_CAP, seed=None):
+        if bot_type not in (1, 2):
+            raise ValueError(f"Invalid botType for batch simulation: {bot_type}")
+        if bot_type == 2 and getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1:
+            raise ValueError("Batch simulation only runs the one-step greedy Localizer2, set LOOKAHEAD_DEPTH = 1")
+        self.table = table
+        self.bot_type = bot_type
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+    def sampleBeliefs(self, L_sizes):
+        """One random start set L of the requested size per episode"""
+        L_sizes = np.asarray(L_sizes)
+        order = np.argsort(self.rng.random((len(L_sizes), self.table.size)), axis=1)
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(self.table.size), axis=1)
+        return ranks < L_sizes[:, None]
+
+    def run(self, beliefs):
+        """
+        Localizes every row of `beliefs` in place.
+        Returns the steps taken per episode and whether it reached a single cell within max_steps.
+
+        While running, the active beliefs are kept sparse as (episode, cell) pairs, a step costs
+        O(cells believed in) rather than O(episodes x open cells).
+        """
+        episodes = len(beliefs)
+        n_cells = self.table.size
+        steps = np.zeros(episodes, dtype=np.int64)
+        localized = np.zeros(episodes, dtype=bool)
+        # Fingerprints only, a 64 bit collision can at worst hide one candidate action from the greedy rule.
+        # Each episode XORs its own salt into them, so the visited beliefs of all episodes share one sorted log.
+        visited = _FingerprintLog()
+        salt = np.random.default_rng(episodes).integers(0, np.iinfo(np.uint64).max, size=episodes,
+                                                         dtype=np.uint64, endpoint=True)
+        n_actions = len(self.table.actions)
+
+        sizes = np.count_nonzero(beliefs, axis=1)
+        if self.bot_type == 2:
+            # Localizer2 checks for a single cell before moving, Localizer1 always moves once
+            localized[sizes == 1] = True
+        active = np.flatnonzero(~localized)
+        rows, cols = np.nonzero(beliefs[active])  # Row k holds episode active[k]
+        fingerprints = self._groupFingerprints(rows, cols, len(active))
+
+        for t in range(1, self.max_steps + 1):
+            if len(active) == 0:
+                break
+            count = len(active)
+            # Every (action, episode, cell) a candidate belief holds, as one sorted key without duplicates
+            keys = np.sort(np.concatenate([(a * count + rows) * n_cells + self.table.next[a][cols]
+                                           for a in range(n_actions)]))
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            group, cells = np.divmod(keys, n_cells)  # group = action * count + row
+            candidate_sizes = np.bincount(group, minlength=n_actions * count).reshape(n_actions, count).T
+            candidate_fp = self._groupFingerprints(group, cells, n_actions * count).reshape(n_actions, count).T
+
+            valid = (candidate_fp != fingerprints[:, None]) & \
+                ~visited.contains(candidate_fp ^ salt[active][:, None])
+            visited.add(fingerprints ^ salt[active])
+
+            score = np.where(valid, candidate_sizes, np.iinfo(np.int64).max).astype(np.float64)
+            if self.bot_type == 1:
+                # Random tie break between equally small candidates
+                score += self.rng.random(score.shape) * 0.5
+            chosen = np.argmin(score, axis=1)
+            # All actions stall, fallback to a random move
+            stuck = ~valid.any(axis=1)
+            chosen[stuck] = self.rng.integers(0, n_actions, size=int(stuck.sum()))
+
+            action, row = np.divmod(group, count)
+            taken = action == chosen[row]
+            rows, cols = row[taken], cells[taken]
+            new_sizes = candidate_sizes[np.arange(count), chosen]
+            fingerprints = candidate_fp[np.arange(count), chosen]
+            steps[active] = t
+
+            done = new_sizes == 1
+            if done.any():
+                finished = done[rows]
+                beliefs[active[done]] = False
+                beliefs[active[rows[finished]], cols[finished]] = True
+                localized[active[done]] = True
+                # Renumber the remaining rows
+                remaining = np.cumsum(~done) - 1
+                rows, cols = remaining[rows[~finished]], cols[~finished]
+                active, fingerprints = active[~done], fingerprints[~done]
+
+        # Episodes stopped by max_steps
+        beliefs[active] = False
+        beliefs[active[rows], cols] = True
+        return steps, localized
+
+    def _groupFingerprints(self, group, cells, groups: int):
+        """Zobrist fingerprint of every group of cells, `group` ascending"""
+        fingerprints = np.zeros(groups, dtype=np.uint64)
+        if len(group):
+            starts = np.flatnonzero(np.concatenate(([True], group[1:] != group[:-1])))
+            fingerprints[group[starts]] = np.bitwise_xor.reduceat(self.table.zobrist[cells], starts)
+        return fingerprints
+
+
+class _FingerprintLog:
+    """
+    Append-only set of uint64 keys with vectorised lookups. Keys are kept in sorted runs of halving length
+    (a merge whenever a new run is at least as long as the last), so there are O(log n) runs to binary search.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def add(self, keys):
+        run = np.sort(keys)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.sort(np.concatenate((self.runs.pop(), run)))
+        self.runs.append(run)
+
+    def contains(self, keys):
+        order = np.argsort(keys, axis=None)
+        needles = keys.ravel()[order]  # Sorted lookups walk every run front to back, far fewer cache misses
+        found = np.zeros(len(needles), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, needles), len(run) - 1)
+            found |= run[positions] == needles
+        result = np.empty(len(needles), dtype=bool)
+        result[order] = found
+        return result.reshape(keys.shape)
+
+
+def batch_game(bot_type, L_sizes, isUseIpCells: bool = True, seed=None, ship=None):
+    """Batched counterpart of auto_game, returns (L_size, steps, status) per episode, status as in data/store.py"""
+    print(f"Batch game started part type: {bot_type}, episodes: {len(L_sizes)}")
+    graph = getGraph(None, isUseIpCells, ship)
+    while graph.step < 4:
+        graph.proceed(is_use_ip_cells=isUseIpCells)
+
+    simulator = BatchSimulator(graph.getTransitionTable(), bot_type, seed=seed)
+    beliefs = simulator.sampleBeliefs(L_sizes)
+
+    # Start sets holding a pair of cells that can never merge are left out of the simulation
+    hopeless = np.zeros(len(beliefs), dtype=bool)
+    if synchronizes(graph.getTransitionTable()) is False:
+        analysis = graph.getMergeAnalysis()
+        never_merge = (analysis.distance < 0).astype(np.int32)
+        held = beliefs.astype(np.int32)
+        hopeless = np.einsum('ei,ij,ej->e', held, never_merge, held) > 0
+
+    steps = np.zeros(len(beliefs), dtype=np.int64)
+    status = np.full(len(beliefs), STATUS_UNLOCALIZABLE)
+    if not hopeless.all():
+        run_steps, localized = simulator.run(beliefs[~hopeless])
+        steps[~hopeless] = run_steps
+        status[~hopeless] = np.where(localized, STATUS_LOCALIZED, STATUS_STEP_CAP)
+    return list(zip(np.asarray(L_sizes).tolist(), steps.tolist(), status.tolist()))
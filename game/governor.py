@@ -0,0 +1,51 @@
+import time
+import constants as cnt
+from data.store import STATUS_CYCLE, STATUS_LOCALIZED, STATUS_STEP_CAP, STATUS_TIME_CAP
+
+
+class RunGovernor:
+    """
+    Bounds one localization episode. check() is called after every proceed() and returns the episode's
+    status once it is over: localized, or stopped at the step cap, the wall-clock budget, or because one
+    belief keeps coming back (the random fallbacks of the strategies can orbit the same states forever).
+    """
+
+    CLOCK_EVERY = 64  # Steps between wall-clock reads
+
+    def __init__(self, max_steps: int = None, max_seconds: float = None, cycle_limit: int = None):
+        self.max_steps = cnt.MAX_MOVES_CAP if max_steps is None else max_steps
+        self.max_seconds = getattr(cnt, 'EPISODE_TIME_LIMIT', None) if max_seconds is None else max_seconds
+        self.cycle_limit = getattr(cnt, 'CYCLE_LIMIT', None) if cycle_limit is None else cycle_limit
+        self.start = time.perf_counter()
+        self.steps = 0
+        self.seen = dict()  # belief fingerprint -> times seen
+
+    def check(self, graph):
+        if graph.game_over:
+            return STATUS_LOCALIZED
+        self.steps += 1
+        if self.max_steps and graph.t >= self.max_steps:
+            return STATUS_STEP_CAP
+        if self.max_seconds and self.steps % self.CLOCK_EVERY == 0 \
+                and time.perf_counter() - self.start >= self.max_seconds:
+            return STATUS_TIME_CAP
+        if self.cycle_limit and graph.currLocalizer is not None:
+            fingerprint = graph.currLocalizer.possible_locations.fingerprint()
+            seen = self.seen.get(fingerprint, 0) + 1
+            self.seen[fingerprint] = seen
+            if seen > self.cycle_limit:
+                return STATUS_CYCLE
+        return None
+
+
+def runGoverned(graph, is_use_ip_cells: bool = True, governor: RunGovernor = None) -> int:
+    """Proceeds the graph until its episode ends or the governor stops it, returns and records the status"""
+    governor = governor or RunGovernor()
+    status = None
+    while status is None:
+        graph.proceed(is_use_ip_cells=is_use_ip_cells)
+        status = governor.check(graph)
+    graph.status = status
+    if status != STATUS_LOCALIZED:
+        graph.game_over = True
+    return status
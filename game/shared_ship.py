@@ -0,0 +1,163 @@
+import random
+from multiprocessing import shared_memory
+import numpy as np
+import constants as cnt
+from graph.graph import ManhattanGraph
+from graph.mergeability import MergeAnalysis, analysisCellLimit, isHopeless, mergeAnalysisFor, synchronizes
+from gateways.robotgateway import LocalizerGateway
+from parts.belief import BeliefSet
+from parts.modelregistry import preloadModels
+from parts.policycache import PolicyCache
+import helpers.profiler as profiler
+from data.store import STATUS_UNLOCALIZABLE
+from game.governor import runGoverned
+
+_warm_graph: ManhattanGraph = None  # Ship of this worker process, built once by initEpisodeWorker
+_init_error: Exception = None  # Why initEpisodeWorker failed, if it did
+_analysis_shm: shared_memory.SharedMemory = None  # Kept open, the worker's MergeAnalysis views into it
+
+
+class SharedShip:
+    """
+    Publishes one ship to pool workers through shared memory.
+    The block holds the (n, n) open mask as uint8 followed by the dead ends as int16 (x, y) pairs,
+    so the picklable descriptor handed to the pool initializer is (name, n, dead end count, synchronizing, merge).
+
+    synchronizing is the parent's synchronizes() result, None if unknown. A MergeAnalysis computed by the parent
+    goes into a second block (distance matrix, then the first-action matrix if built), workers map it instead of
+    each building their own. merge describes that block, or is None.
+    """
+
+    def __init__(self, n: int, open_cells, dead_ends, synchronizing: bool = None, analysis: MergeAnalysis = None):
+        open_mask = np.zeros((n, n), dtype=np.uint8)
+        open_cells = list(open_cells)
+        if open_cells:
+            xs, ys = zip(*open_cells)
+            open_mask[list(xs), list(ys)] = 1
+        dead = np.asarray(list(dead_ends), dtype=np.int16).reshape(-1, 2)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, open_mask.nbytes + dead.nbytes))
+        self.shm.buf[:open_mask.nbytes] = open_mask.tobytes()
+        self.shm.buf[open_mask.nbytes:open_mask.nbytes + dead.nbytes] = dead.tobytes()
+
+        self.analysis_shm = None
+        merge = None
+        if analysis is not None:
+            first = analysis.first_action
+            size = analysis.distance.nbytes + (first.nbytes if first is not None else 0)
+            self.analysis_shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+            self.analysis_shm.buf[:analysis.distance.nbytes] = analysis.distance.tobytes()
+            if first is not None:
+                self.analysis_shm.buf[analysis.distance.nbytes:size] = first.tobytes()
+            merge = (self.analysis_shm.name, analysis.table.size, first is not None,
+                     analysis.unmergeable_pairs, analysis.max_distance)
+        self.descriptor = (self.shm.name, n, len(dead), synchronizing, merge)
+
+    def close(self):
+        for shm in (self.shm, self.analysis_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def mergeAnalysisForWorkers(table, strategy: int):
+    """
+    The MergeAnalysis episodes of `strategy` on this ship will use, computed here once for all workers,
+    or None when they need none: Localizer4 replays merge words, the planner and the hopeless start set
+    check of a ship that doesn't synchronize use the distances, within analysisCellLimit().
+    """
+    if strategy == 4:
+        analysis = mergeAnalysisFor(table)
+        analysis.firstActions()
+        return analysis
+    if table.size > analysisCellLimit():
+        return None
+    if synchronizes(table) is False or (strategy in (2, 3) and getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1):
+        return mergeAnalysisFor(table)
+    return None
+
+
+def _attachMergeAnalysis(table, merge):
+    global _analysis_shm
+    name, cells, has_first, unmergeable_pairs, max_distance = merge
+    _analysis_shm = shared_memory.SharedMemory(name=name)
+    distance = np.ndarray((cells, cells), dtype=np.int32, buffer=_analysis_shm.buf)
+    first = np.ndarray((cells, cells), dtype=np.int8, buffer=_analysis_shm.buf, offset=distance.nbytes) \
+        if has_first else None
+    table.merge_analysis = MergeAnalysis.fromArrays(table, distance, first, unmergeable_pairs, max_distance)
+
+
+def initEpisodeWorker(descriptor, model_paths=(), policy_path=None):
+    """
+    multiprocessing.Pool initializer: builds this worker's ship from shared memory and warms its tables,
+    and loads the ship's policy cache from policy_path if one is given.
+    A failure is kept for checkWorker() instead of raised, a raising initializer makes the pool respawn
+    workers forever and the run would hang.
+    """
+    global _init_error
+    try:
+        _initEpisodeWorker(descriptor, model_paths, policy_path)
+    except Exception as e:
+        _init_error = e
+
+
+def checkWorker():
+    if _init_error is not None:
+        raise RuntimeError(f"Episode worker failed to start: {_init_error!r}") from _init_error
+
+
+def _initEpisodeWorker(descriptor, model_paths, policy_path):
+    global _warm_graph
+    name, n, dead_count, synchronizing, merge = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    # Copy out of the block, the views must be gone before the handle can be closed
+    open_mask = np.frombuffer(shm.buf, dtype=np.uint8, count=n * n).reshape(n, n).astype(bool)
+    dead_ends = [tuple(cell) for cell in
+                 np.frombuffer(shm.buf, dtype=np.int16, count=dead_count * 2, offset=n * n).reshape(-1, 2).tolist()]
+    shm.close()
+
+    graph = ManhattanGraph(screen=None, n=n)
+    graph.create_manhattan_graph()
+    graph.loadLayout(open_mask, dead_ends)
+    table = graph.getTransitionTable()
+    table.synchronizing = synchronizing
+    if merge is not None:
+        _attachMergeAnalysis(table, merge)
+    if policy_path is not None:
+        graph.policy_cache = PolicyCache.load(policy_path)
+    _warm_graph = graph
+    preloadModels(model_paths)
+
+
+def runEpisode(args):
+    """
+    Pool task: one localization episode on the worker's warm ship.
+    args is (seed, L_size), the start belief is a random L_size subset of the open cells.
+    Returns (L_size, steps, status), status is one of data/store.py's STATUS_* codes.
+    """
+    seed, L_size = args
+    random.seed(seed)
+    graph = _warm_graph
+    graph.resetEpisode()
+    table = graph.getTransitionTable()
+    L = [table.cellAt(i) for i in random.sample(range(table.size), min(L_size, table.size))]
+    belief = BeliefSet.fromShip(graph, L)
+    if isHopeless(table, belief):
+        return L_size, 0, STATUS_UNLOCALIZABLE  # No strategy can localize it, don't spend the step budget
+    graph.currLocalizer = LocalizerGateway(graph, None, cnt.CURRENT_PART, belief)
+    status = runGoverned(graph)
+    profiler.endEpisode()
+    return L_size, graph.t, status
+
+
+def takeLearnedPolicy() -> list:
+    """Policy cache entries this worker learned since the previous call, empty without a cache"""
+    if _warm_graph is None or _warm_graph.policy_cache is None:
+        return []
+    return _warm_graph.policy_cache.takePending()
@@ -0,0 +1,107 @@
+import threading
+import time
+from types import SimpleNamespace
+import constants as cnt
+from graph.shipgrid import ShipGrid
+
+UI_FPS = getattr(cnt, 'UI_FPS', 30)  # Frame cap, constants.py files from before UI_FPS use the default
+
+
+class GraphSnapshot:
+    """Copy of the graph state draw_grid reads, safe to render while the simulation keeps running"""
+
+    def __init__(self, graph, busy: bool):
+        self.n = graph.n
+        self.Ship = ShipGrid(graph.n)
+        self.Ship.cells[:] = graph.Ship.cells
+        self.step = graph.step
+        self.current_step = graph.current_step
+        self.canProceed = graph.canProceed and not busy
+        self.game_over = graph.game_over
+        self.one_neighbour_set = list(graph.one_neighbour_set) if graph.step < 4 else []
+        self.dead_ends = list(graph.dead_ends)
+        # Beliefs are never modified in place, holding on to the current one is enough
+        localizer = graph.currLocalizer
+        self.currLocalizer = SimpleNamespace(possible_locations=localizer.possible_locations) if localizer else None
+
+
+class SimulationThread(threading.Thread):
+    """
+    Runs a graph's proceed() calls off the UI thread. A click maps to request(), which runs the same phase
+    ui_game runs inline (all of step 1, all of step 4 or a single step). Snapshots are published at most
+    cnt.UI_FPS times a second plus once at the end of every phase, the UI renders whichever is latest.
+    """
+
+    def __init__(self, graph, isUseIpCells: bool):
+        super().__init__(daemon=True)
+        self.graph = graph
+        self.isUseIpCells = isUseIpCells
+        self.lock = threading.Lock()
+        self.requested = threading.Event()
+        self.stopped = threading.Event()
+        self.busy = False
+        self.snapshot = None
+        self.last_publish = 0.0
+        self._attach(graph)
+
+    def _attach(self, graph):
+        # proceed() draws through draw_grid_internal, route those frames to the snapshot instead
+        graph.frame_listener = self._publish
+        self.graph = graph
+        self._publish(graph, force=True)
+
+    def _publish(self, graph, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self.last_publish < 1 / UI_FPS:
+            return
+        snapshot = GraphSnapshot(graph, self.busy)
+        with self.lock:
+            self.snapshot = snapshot
+        self.last_publish = now
+
+    def latest(self) -> GraphSnapshot:
+        with self.lock:
+            return self.snapshot
+
+    def request(self, graph=None) -> bool:
+        """Starts the next phase, optionally on a new graph (restart). Ignored while a phase is running."""
+        if self.busy:
+            return False
+        if graph is not None:
+            self._attach(graph)
+        self.busy = True
+        self.requested.set()
+        return True
+
+    def stop(self):
+        self.stopped.set()
+        self.requested.set()
+
+    def _step(self):
+        self.graph.proceed(is_use_ip_cells=self.isUseIpCells)
+        self._publish(self.graph)
+        if cnt.TIME_RATE:
+            time.sleep(cnt.TIME_RATE)
+
+    def _runPhase(self):
+        graph = self.graph
+        if graph.step == 1:
+            while graph.step == 1 and not self.stopped.is_set():
+                self._step()
+        if graph.step == 4:
+            while graph.step == 4 and not self.stopped.is_set():
+                self._step()
+        else:
+            self._step()
+
+    def run(self):
+        while True:
+            self.requested.wait()
+            self.requested.clear()
+            if self.stopped.is_set():
+                return
+            try:
+                self._runPhase()
+            finally:
+                self.busy = False
+                self._publish(self.graph, force=True)
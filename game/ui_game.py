@@ -3,18 +3,36 @@ import constants as cnt
 import time
 import graph.graph as g
 from helpers.draw_grid import draw_grid
+from game.simulation import SimulationThread, UI_FPS
 
 
-def ui_game(isUseIpCells: bool = True):
+def isButtonClick(x, y):
+    return cnt.SCREEN_SIZE[0] // 2 - 50 <= x <= cnt.SCREEN_SIZE[0] // 2 + 50 and \
+        cnt.SCREEN_SIZE[1] - 40 <= y <= cnt.SCREEN_SIZE[1] - 10
+
+
+def fitWindow(n, screen_width, screen_height):
+    """Sizes the cells for an n x n ship (library ships need not be GRID_SIZE) and returns the resized display"""
+    cnt.CELL_SIZE, cnt.SCREEN_SIZE = cnt.update_grid_constants(n, screen_width, screen_height)
+    return pygame.display.set_mode(cnt.SCREEN_SIZE, pygame.RESIZABLE)
+
+
+def ui_game(isUseIpCells: bool = True, isThreaded: bool = False):
+    """
+    :param isThreaded: run the simulation on a worker thread, the window keeps handling events and
+                       draws the latest state at up to cnt.UI_FPS frames per second
+    """
+    if isThreaded:
+        return threaded_ui_game(isUseIpCells)
     pygame.init()
 
     screen_width, screen_height = 800, 800  # Default size
-    cnt.CELL_SIZE, cnt.SCREEN_SIZE = cnt.update_grid_constants(cnt.GRID_SIZE, screen_width, screen_height)
-
-    screen = pygame.display.set_mode(cnt.SCREEN_SIZE, pygame.RESIZABLE)
+    screen = fitWindow(cnt.GRID_SIZE, screen_width, screen_height)
     pygame.display.set_caption("The Bot is on Fire!")
 
     graph = g.getGraph(screen, isUseIpCells)
+    graph.screen = screen = fitWindow(graph.n, screen_width, screen_height)
+    clock = pygame.time.Clock()
     running = True
 
     # Graph lifecycle -
@@ -33,15 +51,14 @@ def ui_game(isUseIpCells: bool = True):
 
             elif event.type == pygame.VIDEORESIZE:
                 screen_width, screen_height = event.w, event.h
-                cnt.CELL_SIZE, cnt.SCREEN_SIZE = cnt.update_grid_constants(cnt.GRID_SIZE, screen_width, screen_height)
-                screen = pygame.display.set_mode(cnt.SCREEN_SIZE, pygame.RESIZABLE)
+                graph.screen = screen = fitWindow(graph.n, screen_width, screen_height)
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = pygame.mouse.get_pos()
-                if cnt.SCREEN_SIZE[0] // 2 - 50 <= x <= cnt.SCREEN_SIZE[0] // 2 + 50 and cnt.SCREEN_SIZE[1] - 40 <= y <= \
-                        cnt.SCREEN_SIZE[1] - 10:
+                if isButtonClick(x, y):
                     if graph.game_over:
                         graph = g.getGraph(screen, isUseIpCells)
+                        graph.screen = screen = fitWindow(graph.n, screen_width, screen_height)
 
                     if graph.step == 1:
                         while graph.step == 1:
@@ -56,6 +73,51 @@ def ui_game(isUseIpCells: bool = True):
                     else:
                         graph.proceed(is_use_ip_cells=isUseIpCells)
 
-        draw_grid(screen, graph, cnt.GRID_SIZE)
+        draw_grid(screen, graph, graph.n)
+        clock.tick(UI_FPS)
+
+    pygame.quit()
+
+
+def threaded_ui_game(isUseIpCells: bool = True):
+    pygame.init()
+
+    screen_width, screen_height = 800, 800  # Default size
+    screen = fitWindow(cnt.GRID_SIZE, screen_width, screen_height)
+    pygame.display.set_caption("The Bot is on Fire!")
+    clock = pygame.time.Clock()
+
+    # The graph keeps its screen so ship expansion still runs one cell per step, frames go to the snapshot
+    graph = g.getGraph(screen, isUseIpCells)
+    fitted_n = graph.n
+    graph.screen = screen = fitWindow(fitted_n, screen_width, screen_height)
+    simulation = SimulationThread(graph, isUseIpCells)
+    simulation.start()
+    running = True
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type == pygame.VIDEORESIZE:
+                screen_width, screen_height = event.w, event.h
+                screen = fitWindow(fitted_n, screen_width, screen_height)
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                x, y = pygame.mouse.get_pos()
+                if isButtonClick(x, y) and not simulation.busy:
+                    graph = simulation.graph
+                    simulation.request(g.getGraph(screen, isUseIpCells) if graph.game_over else None)
+
+        # Renders whatever state the simulation published last, unchanged cells are skipped by the renderer
+        snapshot = simulation.latest()
+        if snapshot.n != fitted_n:
+            # A restart can bring a library ship of another size
+            fitted_n = snapshot.n
+            screen = fitWindow(fitted_n, screen_width, screen_height)
+        draw_grid(screen, snapshot, snapshot.n)
+        clock.tick(UI_FPS)
 
+    simulation.stop()
     pygame.quit()
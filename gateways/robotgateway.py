@@ -1,15 +1,21 @@
 from parts import localizer1 as b1
 from parts import localizer2 as b2
 from parts import localizer3 as b3
+from parts import localizer4 as b4
 from parts import localizer as r
+from parts.policycache import CachedLocalizer
 
-def LocalizerGateway(ship, position: tuple, botType: int) -> r.Localizer:
+def LocalizerGateway(ship, position: tuple, botType: int, possible_locations=None) -> r.Localizer:
     if botType == 1:
-        robot = b1.Localizer1(ship, position)
+        robot = b1.Localizer1(ship, position, possible_locations)
     elif botType == 2:
-        robot = b2.Localizer2(ship, position)
+        robot = b2.Localizer2(ship, position, possible_locations)
     elif botType == 3:
-        robot = b3.Localizer3(ship, position)
+        robot = b3.Localizer3(ship, position, possible_locations=possible_locations)
+    elif botType == 4:
+        robot = b4.Localizer4(ship, position, possible_locations)
     else:
         raise ValueError(f"Invalid botType: {botType}")
+    if getattr(ship, 'policy_cache', None) is not None:
+        robot = CachedLocalizer(robot, ship.policy_cache)
     return robot
\ No newline at end of file
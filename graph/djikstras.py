@@ -1,8 +1,11 @@
-import networkx as nx
 import heapq
 
 
-def compatibleGraph(ship: nx.Graph, graph: list) -> dict:
+class NoPathError(Exception):
+    """No path connects two cells, plays the role of networkx.NetworkXNoPath without importing networkx"""
+
+
+def compatibleGraph(ship, graph: list) -> dict:
     adjacencyList = {}
     exclude_nodes = {node for node in ship.nodes if ship.nodes[node].get('weight', 1) == 1}
 
@@ -32,19 +35,6 @@ def _findDistanceFromNode1ToNode2(graph: dict, node1: tuple, node2: tuple):
     return dist
 
 
-def _findCurr(queue: dict, visited: set):
-    least = float('inf')
-    curr = None
-
-    for node in queue.keys():
-        prop = queue[node]
-        if prop['shortest'] < least and node not in visited:
-            curr = node
-            least = prop['shortest']
-
-    return curr
-
-
 def _createPriorityQueue(graph: dict, startNode: tuple):
     queue = dict()
     for node in graph.keys():
@@ -56,10 +46,10 @@ def _createPriorityQueue(graph: dict, startNode: tuple):
 
 def getPathFromATOB(queue: dict, A: tuple, B: tuple):
     if B not in queue:
-        raise nx.NetworkXNoPath(f"Target node {B} not in graph")
+        raise NoPathError(f"Target node {B} not in graph")
 
     if queue[B]['shortest'] == float('inf'):
-        raise nx.NetworkXNoPath(f"No path exists from {A} to {B}")
+        raise NoPathError(f"No path exists from {A} to {B}")
 
     path = []
     curr = B
@@ -68,7 +58,7 @@ def getPathFromATOB(queue: dict, A: tuple, B: tuple):
         path.append(curr)
         curr = queue[curr]['prev']
         if curr is None:  # Shouldn't happen if we checked for inf earlier
-            raise nx.NetworkXNoPath(f"Path broken from {A} to {B}")
+            raise NoPathError(f"Path broken from {A} to {B}")
 
     return path[::-1]
 
@@ -78,22 +68,58 @@ def djikstras(graph: dict, startNode: tuple):
 
     visited = set()
     queue = _createPriorityQueue(graph, startNode)
+    heap = [(0, startNode)]
 
-    while len(visited) != len(graph):
-        curr = _findCurr(queue, visited)
-        if curr is None:  # No reachable nodes left
-            break
+    while heap:
+        shortest, curr = heapq.heappop(heap)
+        if curr in visited:
+            continue  # Stale entry, a shorter distance was already settled
+        visited.add(curr)
 
         for neighbour in graph[curr]:
             neighbourNode = neighbour['node']
             if neighbourNode in visited:
                 continue
 
-            new_dist = queue[curr]['shortest'] + neighbour['dist']
+            new_dist = shortest + neighbour['dist']
             if new_dist < queue[neighbourNode]['shortest']:
                 queue[neighbourNode]['shortest'] = new_dist
                 queue[neighbourNode]['prev'] = curr
+                heapq.heappush(heap, (new_dist, neighbourNode))
+
+    return queue
 
-        visited.add(curr)
 
-    return queue
\ No newline at end of file
+class ShortestPathCache:
+    """
+    Per-ship cache of the compatible adjacency list and of single-source djikstras results.
+    Everything is dropped when the ship's cell weights change (ManhattanGraph.weights_version).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph  # ManhattanGraph
+        self.version = None
+        self.comp_graph = None
+        self.queues = dict()  # start node -> djikstras queue
+
+    def _validate(self):
+        if self.version != self.graph.weights_version:
+            ship = self.graph.Ship
+            self.comp_graph = compatibleGraph(ship, list(ship.adjacency()))
+            self.queues = dict()
+            self.version = self.graph.weights_version
+
+    def compatible(self) -> dict:
+        self._validate()
+        return self.comp_graph
+
+    def queueFrom(self, start: tuple) -> dict:
+        self._validate()
+        queue = self.queues.get(start)
+        if queue is None:
+            queue = djikstras(self.comp_graph, startNode=start)
+            self.queues[start] = queue
+        return queue
+
+    def path(self, start: tuple, target: tuple) -> list:
+        return getPathFromATOB(self.queueFrom(start), start, target)
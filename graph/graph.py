@@ -1,45 +1,56 @@
-import networkx as nx
 import random
+import time
+import numpy as np
 import constants as cnt
-import helpers.draw_grid as dg
-from graph.sample.sample1 import currently_open_1, dead_ends_1
+from graph.djikstras import ShortestPathCache
+from graph.shipgrid import ShipGrid
+from graph.shiplibrary import ShipRecord, configuredShip
+from graph.mergeability import MergeAnalysis, mergeAnalysisFor
+from graph.transitions import TransitionTable, tableForLayout
 from parts.localizer import Localizer
 from gateways.robotgateway import LocalizerGateway
 from helpers.draw_grid import draw_grid_internal
 from helpers.generic import HelperService
+import helpers.profiler as profiler
+from helpers.indexedset import IndexedSet
+from helpers.neighbourhood import NeighbourhoodAnalysis
 
 
 class ManhattanGraph:
     def __init__(self, screen, n, isUseIpCells: bool = False):
         self.n = n  # Dimension of rhe 2d graph
         self.game_over = False  # Indicates whether game may or may not be proceeded
-        self.Ship = nx.Graph()  # Graph nodes represented using networkx.Graph object
+        self.Ship = ShipGrid(n)  # Cell weights as a uint8 grid, exposes the networkx.Graph node interface
         self.path = None  # Path outlined by the bot
         self.canProceed = True  # Indicates whether simulation is already under progress
         self.screen = screen  # pygame.screen - May or may not be None
+        self.frame_listener = None  # Called instead of drawing when set, see game/simulation.py
         self.current_step = "Ship Expansion"  # Display Label
         self.open_ship_initialized = False
 
         self.step = 1  # Track algorithm step
-        self.one_neighbour_set = set()  # Set of nodes with one 'open' cell, # Zero indicates 'open' and One indicates 'close'
+        self.one_neighbour_set = IndexedSet()  # Set of nodes with one 'open' cell, # Zero indicates 'open' and One indicates 'close'
         self.currently_open = set()  # Nodes that are 'open', # Zero indicates 'open' and One indicates 'close'
-        self.multi_neighbour_set = set()  # Converse of one_neighbour_set
+        self.multi_neighbour_set = IndexedSet()  # Converse of one_neighbour_set
         self.dead_ends = list()  # cells that have 3 closed cells around them
         self.curr_bot_pos = None  # Current position of bot
         self.isUseIpCells = isUseIpCells  # A boolean flag indicating opened cells are already defined
+        self.ip_ship: ShipRecord = None  # Library ship loaded when isUseIpCells is set, None uses sample1
         self.currLocalizer: Localizer = None
         self.t = 0  # Time step, calculates how many times proceed() ahs been called. Also, a measure for no of steps taken by bot
         self.L_size = None
+        self.status = None  # Outcome of a governed episode (data/store.py STATUS_*), see game/governor.py
+        self.policy_cache = None  # PolicyCache shared by this ship's episodes (parts/policycache.py), None to disable
+        self.transitions: TransitionTable = None  # Per-ship action table, built lazily once the ship is open
+        self.weights_version = 0  # Bumped on every cell weight change, invalidates cached paths
+        self.paths = ShortestPathCache(self)
+        self.neighbourhood: NeighbourhoodAnalysis = None  # Cached neighbour counts, see getNeighbourhood()
+        self.neighbourhood_version = None
 
     def create_manhattan_graph(self):
-        for i in range(self.n):
-            for j in range(self.n):
-                node = (i, j)
-                self.Ship.add_node(node, weight=cnt.CELL_CLOSED)
-                if i > 0:
-                    self.Ship.add_edge(node, (i - 1, j), weight=cnt.CELL_CLOSED)
-                if j > 0:
-                    self.Ship.add_edge(node, (i, j - 1), weight=cnt.CELL_CLOSED)
+        # Every cell starts closed, edges between 4-neighbours are implied by the grid
+        self.Ship.fill(cnt.CELL_CLOSED)
+        self.weights_version += 1
 
     def initialize_ship_opening(self):
         if self.open_ship_initialized:
@@ -48,48 +59,51 @@ class ManhattanGraph:
         xCord = random.randint(1, self.n - 2)
         yCord = random.randint(1, self.n - 2)
 
-        self.one_neighbour_set = set(HelperService.getEligibleNeighbours(self, (xCord, yCord)))
-        self.currently_open.add((xCord, yCord))
-        self.Ship.nodes[(xCord, yCord)]['weight'] = 0
+        self.one_neighbour_set = IndexedSet(HelperService.getEligibleNeighbours(self, (xCord, yCord)))
+        self.openCell((xCord, yCord))
         self.open_ship_initialized = True
         draw_grid_internal(self)
 
     def proceed(self, is_use_ip_cells:bool):
+        if not profiler.ENABLED:
+            return self._proceed(is_use_ip_cells)
+        step = self.step
+        start = time.perf_counter()
+        self._proceed(is_use_ip_cells)
+        profiler.addTime(f"proceed.step{step}", time.perf_counter() - start)
+        if step == 4 and self.currLocalizer is not None:
+            profiler.count("belief_size", len(self.currLocalizer.possible_locations))
+
+    def _proceed(self, is_use_ip_cells:bool):
         if self.step == 1:
-            if is_use_ip_cells:
+            if is_use_ip_cells and self.ip_ship is not None:
+                self.loadShip(self.ip_ship)
+                self.step = 4
+                return
+            elif is_use_ip_cells:
+                from graph.sample.sample1 import currently_open_1, dead_ends_1
+
                 self.currently_open = currently_open_1
                 self.dead_ends = dead_ends_1
+                self.transitions = None
                 for i, j in self.dead_ends:
-                    self.Ship.nodes[(i, j)]['weight'] = cnt.CELL_CLOSED
+                    self.setCellWeight((i, j), cnt.CELL_CLOSED)
                 for i, j in self.currently_open:
-                    self.Ship.nodes[(i, j)]['weight'] = cnt.CELL_OPENED
+                    self.setCellWeight((i, j), cnt.CELL_OPENED)
                 self.step = 4
                 return
+            elif self.screen is None:
+                # Nothing to animate, open the whole ship in one go
+                self.expandShip()
             else:
-                # Chose one cell to expand
                 self.initialize_ship_opening()
-                cell_to_expand = random.choice(list(self.one_neighbour_set))
-                self.Ship.nodes[cell_to_expand]['weight'] = 0  # Zero indicates 'open' and One indicates 'close'
-                self.currently_open.add(cell_to_expand)
-                self.one_neighbour_set.remove(cell_to_expand)
-                # one_neighbour_set is a set of nodes that are surrounded by just one open cell
-
-                new_candidates = HelperService.getEligibleNeighbours(self, cell_to_expand)
-                for candidate in new_candidates:
-                    if candidate not in self.multi_neighbour_set:
-                        if candidate in self.one_neighbour_set:
-                            self.one_neighbour_set.remove(candidate)
-                            self.multi_neighbour_set.add(candidate)
-                        else:
-                            self.one_neighbour_set.add(candidate)
+                self._expandOnce()
                 if not self.one_neighbour_set:
-                    # We ran out of cells that we can expand into
-                    self.step = 2  # Move to dead-end detection
-                    self.current_step = "Identifying Dead Ends"
+                    self._finishExpansion()
                 draw_grid_internal(self)
         elif self.step == 2:
             HelperService.printDebug(f"Step {self.step} has begun!!")
-            self.dead_ends = [node for node in self.currently_open if self.isNodeIsolated(node)]
+            self.dead_ends = self.getNeighbourhood().deadEndCells()
             self.step = 3  # Move to dead-end expansion
             self.current_step = "Expanding Dead Ends"
             draw_grid_internal(self)
@@ -100,14 +114,16 @@ class ManhattanGraph:
                 HelperService.printDebug(f"Step {self.step} has begun!!")
                 num_to_expand = len(self.dead_ends) // 2
                 random.shuffle(self.dead_ends)
+                frontier = self.getNeighbourhood().frontier
+                cells = self.Ship.cells
                 for i in range(num_to_expand):
                     dead_end = self.dead_ends[i]
-                    closed_neighbors = [neighbor for neighbor in HelperService.getEligibleNeighbours(self, dead_end) if
-                                        self.Ship.nodes[neighbor]['weight'] == 1]
+                    # Re-check the live grid, an earlier dead end may already have opened a shared neighbour
+                    closed_neighbors = [neighbor for neighbor in HelperService.neighbours(dead_end) if
+                                        frontier[neighbor] and cells[neighbor] == cnt.CELL_CLOSED]
                     if closed_neighbors:
                         to_open = random.choice(closed_neighbors)
-                        self.Ship.nodes[to_open]['weight'] = 0
-                        self.currently_open.add(to_open)
+                        self.openCell(to_open)
             else:
                 HelperService.printDebug("Dead ends not found!!")
             # Ship Generation is Complete!
@@ -122,24 +138,91 @@ class ManhattanGraph:
             self.currLocalizer.localize()
         elif self.step == 5:
             self.game_over = True
-            dg.draw_grid_internal(self)
-
-    def isNodeIsolated(self, node: tuple):
-        x, y = node
-        neighbors = [(x + 1, y), (x - 1, y), (x, y - 1), (x, y + 1)]
-
-        isOpenCount = 0
-        for nX, nY in neighbors:
-            node = self.Ship.nodes[(nX, nY)]
-            if node['weight'] == 0:
-                isOpenCount += 1
-
-        if isOpenCount == 1:
-            return True
-
+            draw_grid_internal(self)
 
-def getGraph(screen, isUseIpCells: bool = False):
-    graph = ManhattanGraph(screen=screen, n=cnt.GRID_SIZE, isUseIpCells=isUseIpCells)
+    def _expandOnce(self):
+        # Chose one cell to expand
+        cell_to_expand = self.one_neighbour_set.choice()
+        self.openCell(cell_to_expand)  # Zero indicates 'open' and One indicates 'close'
+        self.one_neighbour_set.remove(cell_to_expand)
+        # one_neighbour_set is a set of nodes that are surrounded by just one open cell
+
+        new_candidates = HelperService.getEligibleNeighbours(self, cell_to_expand)
+        for candidate in new_candidates:
+            if candidate not in self.multi_neighbour_set:
+                if candidate in self.one_neighbour_set:
+                    self.one_neighbour_set.remove(candidate)
+                    self.multi_neighbour_set.add(candidate)
+                else:
+                    self.one_neighbour_set.add(candidate)
+
+    def _finishExpansion(self):
+        # We ran out of cells that we can expand into
+        self.step = 2  # Move to dead-end detection
+        self.current_step = "Identifying Dead Ends"
+
+    def expandShip(self):
+        """Runs all of step 1 without going through proceed(), used when there is no screen to draw on"""
+        self.initialize_ship_opening()
+        while self.one_neighbour_set:
+            self._expandOnce()
+        self._finishExpansion()
+
+    def loadShip(self, ship: ShipRecord):
+        """Opens the cells of a pregenerated library ship in one array write"""
+        self.loadLayout(ship.openMask(), ship.deadEnds())
+
+    def loadLayout(self, open_mask, dead_ends: list):
+        self.Ship.cells[:] = np.where(open_mask, cnt.CELL_OPENED, cnt.CELL_CLOSED)
+        self.weights_version += 1
+        xs, ys = np.nonzero(open_mask)
+        self.currently_open = set(zip(xs.tolist(), ys.tolist()))
+        self.dead_ends = dead_ends
+        self.transitions = None
+
+    def resetEpisode(self):
+        """Readies a fully generated ship for another localization episode"""
+        self.game_over = False
+        self.t = 0
+        self.step = 4
+        self.currLocalizer = None
+        self.status = None
+        self.current_step = "Ship Generation Complete"
+
+    def setCellWeight(self, node: tuple, weight: int):
+        self.Ship.nodes[node]['weight'] = weight
+        self.weights_version += 1
+
+    def openCell(self, node: tuple):
+        self.setCellWeight(node, cnt.CELL_OPENED)
+        self.currently_open.add(node)
+        self.transitions = None  # Layout changed, table must be rebuilt
+
+    def getTransitionTable(self) -> TransitionTable:
+        if self.transitions is None:
+            self.transitions = tableForLayout(self.n, self.currently_open)
+        return self.transitions
+
+    def getMergeAnalysis(self) -> MergeAnalysis:
+        """Which cells can be told apart on this ship, cached with its transition table"""
+        return mergeAnalysisFor(self.getTransitionTable())
+
+    def getNeighbourhood(self) -> NeighbourhoodAnalysis:
+        if self.neighbourhood_version != self.weights_version:
+            self.neighbourhood = NeighbourhoodAnalysis(self.Ship.openMask())
+            self.neighbourhood_version = self.weights_version
+        return self.neighbourhood
+
+    def isNodeIsolated(self, node: tuple) -> bool:
+        """The cell has exactly one open 4-neighbour"""
+        return bool(self.getNeighbourhood().open_counts[node] == 1)
+
+
+def getGraph(screen, isUseIpCells: bool = False, ship: ShipRecord = None):
+    if ship is None and isUseIpCells:
+        ship = configuredShip()
+    graph = ManhattanGraph(screen=screen, n=ship.n if ship else cnt.GRID_SIZE, isUseIpCells=isUseIpCells)
+    graph.ip_ship = ship
     graph.create_manhattan_graph()
 
     return graph
@@ -0,0 +1,215 @@
+import numpy as np
+import constants as cnt
+
+
+class MergeAnalysis:
+    """
+    Pair-merge analysis of a ship's transition table. Two cells can be told apart by localization
+    only if some action sequence sends both to the same cell; distance[p, q] is the length of the
+    shortest such sequence, or -1 if none exists. Found by a backward BFS from the pairs {p, p}
+    over the pair transitions (p, q) -> (next[a][p], next[a][q]).
+
+    A start set holding a pair that can never merge can never shrink to one cell. If every pair merges the
+    ship is synchronizing and any start set of k cells collapses within (k - 1) * max_distance steps,
+    merging one closest pair at a time.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        n = table.size
+        self.distance = np.full((n, n), -1, dtype=np.int32)
+        self.distance[np.arange(n), np.arange(n)] = 0
+        self._search()
+        off_diagonal = ~np.eye(n, dtype=bool)
+        self.unmergeable_pairs = int(np.count_nonzero(self.distance[off_diagonal] < 0)) // 2
+        self.max_distance = int(self.distance.max()) if n else 0
+        self.first_action = None  # See firstActions(), built on first use
+
+    @staticmethod
+    def fromArrays(table, distance, first_action, unmergeable_pairs: int, max_distance: int):
+        """Analysis over matrices computed elsewhere, e.g. views of a block another process shared"""
+        analysis = MergeAnalysis.__new__(MergeAnalysis)
+        analysis.table = table
+        analysis.distance = distance
+        analysis.unmergeable_pairs = unmergeable_pairs
+        analysis.max_distance = max_distance
+        analysis.first_action = first_action
+        return analysis
+
+    def _preimages(self, a: int):
+        """CSR preimage lists of action a: cells order[start[x]:start[x + 1]] move to x"""
+        targets = self.table.next[a]
+        order = np.argsort(targets, kind='stable').astype(np.int32)
+        start = np.searchsorted(targets[order], np.arange(self.table.size + 1)).astype(np.int32)
+        return order, start
+
+    def _search(self):
+        preimages = [self._preimages(a) for a in range(len(self.table.next))]
+        frontier_p = np.arange(self.table.size, dtype=np.int32)
+        frontier_q = frontier_p.copy()
+        level = 0
+        while len(frontier_p):
+            level += 1
+            found_p, found_q = [], []
+            for order, start in preimages:
+                # Every (p', q') with next[a][p'] = p and next[a][q'] = q, one row per combination
+                deg_p = start[frontier_p + 1] - start[frontier_p]
+                deg_q = start[frontier_q + 1] - start[frontier_q]
+                combinations = deg_p * deg_q
+                rows = np.repeat(np.arange(len(frontier_p)), combinations)
+                if len(rows) == 0:
+                    continue
+                k = np.arange(len(rows)) - np.repeat(np.cumsum(combinations) - combinations, combinations)
+                p = order[start[frontier_p[rows]] + k // deg_q[rows]]
+                q = order[start[frontier_q[rows]] + k % deg_q[rows]]
+                new = self.distance[p, q] < 0
+                found_p.append(p[new])
+                found_q.append(q[new])
+            if not found_p:
+                break
+            p = np.concatenate(found_p)
+            q = np.concatenate(found_q)
+            # Keep each unordered pair once, as (smaller, larger)
+            keep = p != q
+            pairs = np.unique(np.stack([np.minimum(p, q)[keep], np.maximum(p, q)[keep]], axis=1), axis=0)
+            pairs = pairs[self.distance[pairs[:, 0], pairs[:, 1]] < 0]
+            self.distance[pairs[:, 0], pairs[:, 1]] = level
+            self.distance[pairs[:, 1], pairs[:, 0]] = level
+            frontier_p, frontier_q = pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.int32)
+
+    def firstActions(self):
+        """
+        first[p, q]: index of an action that starts a shortest merging sequence of p and q (-1 on the diagonal
+        or when they never merge). Replaying first[] from pair to pair spells out the whole sequence.
+        """
+        if self.first_action is None:
+            first = np.full(self.distance.shape, -1, dtype=np.int8)
+            merging = self.distance > 0
+            for a in reversed(range(len(self.table.next))):  # Earlier actions win ties
+                nxt = self.table.next[a]
+                first[merging & (self.distance[nxt[:, None], nxt[None, :]] == self.distance - 1)] = a
+            self.first_action = first
+        return self.first_action
+
+    def isSynchronizing(self) -> bool:
+        """Every start set, the whole ship included, can be collapsed to one cell"""
+        return self.unmergeable_pairs == 0
+
+    def _indices(self, cells):
+        if hasattr(cells, 'indices'):
+            return cells.indices()  # BeliefSet
+        indices = np.array([self.table.indexOf(cell) for cell in cells], dtype=np.int64)
+        return indices[indices >= 0]
+
+    def isHopeless(self, cells) -> bool:
+        """The start set (cells or a BeliefSet) holds two cells that no action sequence can tell apart"""
+        if self.isSynchronizing():
+            return False
+        indices = self._indices(cells)
+        return bool(np.any(self.distance[np.ix_(indices, indices)] < 0))
+
+    def stepBound(self, cells) -> int:
+        """Upper bound on the steps an optimal strategy needs to collapse the start set, None when unknown"""
+        if not self.isSynchronizing():
+            return None
+        return max(len(self._indices(cells)) - 1, 0) * self.max_distance
+
+    def summary(self) -> dict:
+        return {
+            'cells': self.table.size,
+            'synchronizing': self.isSynchronizing(),
+            'unmergeable_pairs': self.unmergeable_pairs,
+            'max_merge_distance': self.max_distance,
+            'full_ship_bound': max(self.table.size - 1, 0) * self.max_distance if self.isSynchronizing() else None,
+        }
+
+
+def mergeAnalysisFor(table) -> MergeAnalysis:
+    """The analysis of a transition table, computed once and kept on the (process-wide cached) table"""
+    analysis = getattr(table, 'merge_analysis', None)
+    if analysis is None:
+        analysis = MergeAnalysis(table)
+        table.merge_analysis = analysis
+    return analysis
+
+
+def analysisCellLimit() -> int:
+    """Largest ship (in open cells) the pair checks run on, the full matrices cost 5 bytes per cell pair"""
+    return getattr(cnt, 'MERGE_ANALYSIS_MAX_CELLS', 2500)
+
+
+def _mergeWord(table, p: int, q: int):
+    """Shortest action indices sending p and q to one cell, by a forward BFS over pairs, None if they never merge"""
+    n = table.size
+    P, Q = np.array([min(p, q)]), np.array([max(p, q)])
+    seen = np.zeros((n * n + 7) // 8, dtype=np.uint8)  # One bit per ordered (smaller, larger) pair
+    code = int(P[0]) * n + int(Q[0])
+    seen[code >> 3] |= np.uint8(1 << (code & 7))
+    levels = []  # Per level: index of every pair's parent in the level before, action leading to it
+    while len(P):
+        next_p, next_q, parents, actions = [], [], [], []
+        for a, nxt in enumerate(table.next):
+            moved_p, moved_q = nxt[P], nxt[Q]
+            merged = np.flatnonzero(moved_p == moved_q)
+            if len(merged):
+                word, i = [a], int(merged[0])
+                for parent, action in reversed(levels):
+                    word.append(int(action[i]))
+                    i = int(parent[i])
+                return word[::-1]
+            next_p.append(np.minimum(moved_p, moved_q))
+            next_q.append(np.maximum(moved_p, moved_q))
+            parents.append(np.arange(len(P)))
+            actions.append(np.full(len(P), a, dtype=np.int8))
+        P, Q = np.concatenate(next_p), np.concatenate(next_q)
+        codes, first = np.unique(P.astype(np.int64) * n + Q, return_index=True)
+        new = ((seen[codes >> 3] >> (codes & 7).astype(np.uint8)) & 1) == 0
+        codes, first = codes[new], first[new]
+        np.bitwise_or.at(seen, codes >> 3, (1 << (codes & 7)).astype(np.uint8))
+        P, Q = P[first], Q[first]
+        levels.append((np.concatenate(parents)[first], np.concatenate(actions)[first]))
+    return None
+
+
+def _synchronizes(table) -> bool:
+    states = np.arange(table.size)
+    while len(states) > 1:
+        # Shrink with single actions while one helps, then merge the two candidates closest on the grid
+        smallest = min((np.unique(nxt[states]) for nxt in table.next), key=len)
+        if len(smallest) < len(states):
+            states = smallest
+            continue
+        cells = table.cells[states]
+        distance = np.abs(cells[:, None, :] - cells[None, :, :]).sum(axis=-1)
+        np.fill_diagonal(distance, np.iinfo(distance.dtype).max)
+        i, j = np.unravel_index(np.argmin(distance), distance.shape)
+        word = _mergeWord(table, int(states[i]), int(states[j]))
+        if word is None:
+            return False  # The image of the ship holds a pair that never merges, so does the ship
+        for a in word:
+            states = np.unique(table.next[a][states])
+    return True
+
+
+def synchronizes(table):
+    """
+    Whether every start set, the whole ship included, can be collapsed to one cell, without MergeAnalysis'
+    N x N matrices: collapses the whole ship pair by pair and fails on the first pair that never merges.
+    None (unknown) for ships above analysisCellLimit(). Cached on the (process-wide cached) table.
+    """
+    result = getattr(table, 'synchronizing', None)
+    if result is None:
+        analysis = getattr(table, 'merge_analysis', None)
+        if analysis is not None:
+            result = analysis.isSynchronizing()
+        elif table.size <= analysisCellLimit():
+            result = _synchronizes(table)
+        table.synchronizing = result
+    return result
+
+
+def isHopeless(table, cells) -> bool:
+    """MergeAnalysis.isHopeless where it is cheap to answer: always False unless the ship is known not to synchronize"""
+    if synchronizes(table) is not False:
+        return False
+    return mergeAnalysisFor(table).isHopeless(cells)
@@ -0,0 +1,107 @@
+import numpy as np
+import constants as cnt
+
+EDGE_WEIGHT = cnt.CELL_CLOSED  # Every edge of the manhattan graph has unit weight
+
+
+class _CellAttributes:
+    """Dict-like view of one cell, so `ship.nodes[node]['weight']` keeps working"""
+
+    __slots__ = ('cells', 'node')
+
+    def __init__(self, cells, node):
+        self.cells = cells
+        self.node = node
+
+    def __getitem__(self, key):
+        if key != 'weight':
+            raise KeyError(key)
+        return int(self.cells[self.node])
+
+    def __setitem__(self, key, value):
+        if key != 'weight':
+            raise KeyError(key)
+        self.cells[self.node] = value
+
+    def get(self, key, default=None):
+        return self[key] if key == 'weight' else default
+
+
+class _NodeView:
+    """Stand-in for networkx's `Graph.nodes`"""
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __getitem__(self, node):
+        if node not in self.grid:
+            raise KeyError(node)
+        return _CellAttributes(self.grid.cells, node)
+
+    def get(self, node, default=None):
+        return _CellAttributes(self.grid.cells, node) if node in self.grid else default
+
+    def __contains__(self, node):
+        return node in self.grid
+
+    def __iter__(self):
+        return iter(self.grid)
+
+    def __len__(self):
+        return self.grid.n * self.grid.n
+
+
+class ShipGrid:
+    """
+    Occupancy grid of the ship backed by an (n, n) uint8 array of cell weights
+    (cnt.CELL_OPENED / cnt.CELL_CLOSED). Adjacency is the 4-neighbourhood and is derived on demand.
+    Exposes the subset of the networkx.Graph interface the project uses; call to_networkx() for the real thing.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.cells = np.full((n, n), cnt.CELL_CLOSED, dtype=np.uint8)
+        self.nodes = _NodeView(self)
+
+    def fill(self, weight: int):
+        self.cells.fill(weight)
+
+    def openMask(self):
+        return self.cells == cnt.CELL_OPENED
+
+    def neighbours(self, node: tuple) -> list:
+        x, y = node
+        return [(nX, nY) for nX, nY in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                if 0 <= nX < self.n and 0 <= nY < self.n]
+
+    def adjacency(self):
+        for node in self:
+            yield node, self[node]
+
+    def __getitem__(self, node):
+        return {neighbour: {'weight': EDGE_WEIGHT} for neighbour in self.neighbours(node)}
+
+    def __contains__(self, node):
+        try:
+            x, y = node
+        except (TypeError, ValueError):
+            return False
+        return 0 <= x < self.n and 0 <= y < self.n
+
+    def __iter__(self):
+        return ((i, j) for i in range(self.n) for j in range(self.n))
+
+    def __len__(self):
+        return self.n * self.n
+
+    def number_of_nodes(self):
+        return len(self)
+
+    def to_networkx(self):
+        import networkx as nx
+
+        graph = nx.grid_2d_graph(self.n, self.n)
+        nx.set_edge_attributes(graph, EDGE_WEIGHT, 'weight')
+        for node in graph.nodes:
+            graph.nodes[node]['weight'] = int(self.cells[node])
+        return graph
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import numpy as np
+import constants as cnt
+
+# File layout:
+#   header  | magic (8 bytes) | version uint32 | count uint32 | index offset uint64 |
+#   records | per ship: packed n*n occupancy bitmap, then its dead ends as int16 (x, y) pairs
+#   index   | count entries of INDEX_DTYPE
+MAGIC = b"SHIPLIB1"
+VERSION = 1
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('count', '<u4'), ('index_offset', '<u8')])
+INDEX_DTYPE = np.dtype([
+    ('n', '<u4'),
+    ('open_count', '<u4'),
+    ('bitmap_offset', '<u8'),
+    ('bitmap_bytes', '<u4'),
+    ('dead_offset', '<u8'),
+    ('dead_count', '<u4'),
+    ('seed', '<i8'),
+    ('hash', 'S32'),
+])
+
+
+def layoutHash(n: int, bitmap) -> str:
+    """Content hash of a ship, identical layouts share it across libraries"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(int(n).to_bytes(4, 'little'))
+    digest.update(np.ascontiguousarray(bitmap).tobytes())
+    return digest.hexdigest()
+
+
+def shipHash(n: int, open_cells) -> str:
+    """layoutHash of a ship given as its open cells"""
+    mask = np.zeros((n, n), dtype=bool)
+    open_cells = list(open_cells)
+    if open_cells:
+        xs, ys = zip(*open_cells)
+        mask[list(xs), list(ys)] = True
+    return layoutHash(n, np.packbits(mask))
+
+
+class ShipRecord:
+    """One ship of a library. The bitmap and dead ends are views into the memory-mapped file."""
+
+    def __init__(self, index: int, n: int, bitmap, dead_ends, seed: int, hash: str):
+        self.index = index
+        self.n = n
+        self.bitmap = bitmap
+        self.dead_ends_array = dead_ends
+        self.seed = seed
+        self.hash = hash
+
+    def openMask(self):
+        return np.unpackbits(self.bitmap, count=self.n * self.n).reshape(self.n, self.n).astype(bool)
+
+    def openCells(self) -> set:
+        xs, ys = np.nonzero(self.openMask())
+        return set(zip(xs.tolist(), ys.tolist()))
+
+    def deadEnds(self) -> list:
+        return [tuple(cell) for cell in self.dead_ends_array.tolist()]
+
+
+class ShipLibrary:
+    """Read-only, memory-mapped collection of pregenerated ships addressable by index or content hash"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        header = self.data[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a ship library")
+        if header['version'] != VERSION:
+            raise ValueError(f"Unsupported ship library version {header['version']} in {path}")
+        start = int(header['index_offset'])
+        self.index = self.data[start:start + int(header['count']) * INDEX_DTYPE.itemsize].view(INDEX_DTYPE)
+        self.by_hash = {digest.decode(): i for i, digest in enumerate(self.index['hash'].tolist())}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> ShipRecord:
+        entry = self.index[i]
+        bitmap_offset = int(entry['bitmap_offset'])
+        bitmap = self.data[bitmap_offset:bitmap_offset + int(entry['bitmap_bytes'])]
+        dead_offset = int(entry['dead_offset'])
+        dead_ends = self.data[dead_offset:dead_offset + int(entry['dead_count']) * 4].view('<i2').reshape(-1, 2)
+        return ShipRecord(i, int(entry['n']), bitmap, dead_ends, int(entry['seed']), entry['hash'].decode())
+
+    def byHash(self, hash: str) -> ShipRecord:
+        return self[self.by_hash[hash]]
+
+    @staticmethod
+    def write(path: str, ships):
+        """
+        Writes a library file. `ships` yields ManhattanGraph objects (after ship generation)
+        or (n, open_cells, dead_ends, seed) tuples.
+        """
+        entries = []
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(np.zeros(1, dtype=HEADER_DTYPE).tobytes())
+            for ship in ships:
+                if isinstance(ship, tuple):
+                    n, open_cells, dead_ends, seed = ship
+                else:
+                    n, open_cells, dead_ends, seed = ship.n, ship.currently_open, ship.dead_ends, -1
+
+                mask = np.zeros((n, n), dtype=bool)
+                open_cells = list(open_cells)
+                if open_cells:
+                    xs, ys = zip(*open_cells)
+                    mask[list(xs), list(ys)] = True
+                bitmap = np.packbits(mask)
+                dead = np.asarray(list(dead_ends), dtype='<i2').reshape(-1, 2)
+
+                entry = np.zeros(1, dtype=INDEX_DTYPE)[0]
+                entry['n'] = n
+                entry['open_count'] = len(open_cells)
+                entry['bitmap_offset'] = file.tell()
+                entry['bitmap_bytes'] = len(bitmap)
+                file.write(bitmap.tobytes())
+                entry['dead_offset'] = file.tell()
+                entry['dead_count'] = len(dead)
+                file.write(dead.tobytes())
+                entry['seed'] = seed
+                entry['hash'] = layoutHash(n, bitmap).encode()
+                entries.append(entry)
+
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header['magic'] = MAGIC
+            header['version'] = VERSION
+            header['count'] = len(entries)
+            header['index_offset'] = file.tell()
+            file.write(np.array(entries, dtype=INDEX_DTYPE).tobytes())
+            file.seek(0)
+            file.write(header.tobytes())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def generate(path: str, count: int, n: int = cnt.GRID_SIZE, seed: int = 0):
+        """Generates `count` headless ships of size n (proceed steps 1-3) and writes them to a library"""
+        import random
+        from graph.graph import ManhattanGraph
+
+        def ships():
+            for i in range(count):
+                random.seed(seed + i)
+                graph = ManhattanGraph(screen=None, n=n)
+                graph.create_manhattan_graph()
+                while graph.step < 4:
+                    graph.proceed(is_use_ip_cells=False)
+                yield n, graph.currently_open, graph.dead_ends, seed + i
+
+        ShipLibrary.write(path, ships())
+
+
+_open_libraries = dict()  # path -> ShipLibrary, one memory map per process
+_default_ships = dict()  # (path, index) -> (open cells, dead ends)
+
+
+def openLibrary(path: str) -> ShipLibrary:
+    library = _open_libraries.get(path)
+    if library is None:
+        library = ShipLibrary(path)
+        _open_libraries[path] = library
+    return library
+
+
+def configuredShip():
+    """ShipRecord of cnt.SHIP_LIBRARY[cnt.SHIP_INDEX], None when no library is configured"""
+    library = getattr(cnt, 'SHIP_LIBRARY', None)
+    if not library:
+        return None
+    return openLibrary(library)[getattr(cnt, 'SHIP_INDEX', 0)]
+
+
+def defaultShip():
+    """
+    The predefined ship used with isUseIpCells, as (open cells, dead ends).
+    Comes from cnt.SHIP_LIBRARY[cnt.SHIP_INDEX] when a library is configured, else from graph/sample/sample1.py.
+    """
+    record = configuredShip()
+    if record is not None:
+        key = (cnt.SHIP_LIBRARY, getattr(cnt, 'SHIP_INDEX', 0))
+        if key not in _default_ships:
+            _default_ships[key] = record.openCells(), record.deadEnds()
+        return _default_ships[key]
+    from graph.sample.sample1 import currently_open_1, dead_ends_1
+    return currently_open_1, dead_ends_1
+
+
+def defaultShipSize() -> int:
+    """Grid size n of the ship returned by defaultShip()"""
+    record = configuredShip()
+    return record.n if record is not None else cnt.GRID_SIZE
@@ -0,0 +1,84 @@
+import numpy as np
+
+ACTIONS = ["UP", "DOWN", "LEFT", "RIGHT"]
+
+# Row / column offset of every action, UP decreases the row index
+ACTION_OFFSETS = {
+    'UP': (-1, 0),
+    'DOWN': (1, 0),
+    'LEFT': (0, -1),
+    'RIGHT': (0, 1),
+}
+
+
+class TransitionTable:
+    """
+    Move table for one ship. Open cells are numbered densely (row-major) and
+    next[a][i] is the cell the bot ends up in when it tries action a from cell i.
+    Built once per ship and shared by every localizer / episode running on it.
+    """
+
+    def __init__(self, n: int, open_cells):
+        self.n = n
+        self.actions = ACTIONS
+        self.action_index = {action: i for i, action in enumerate(ACTIONS)}
+
+        open_mask = np.zeros((n, n), dtype=bool)
+        open_cells = list(open_cells)
+        if open_cells:
+            xs, ys = zip(*open_cells)
+            open_mask[list(xs), list(ys)] = True
+
+        self.cells = np.argwhere(open_mask)  # (N, 2) coordinates of every dense index
+        self.size = len(self.cells)
+        self.index = np.full((n, n), -1, dtype=np.int32)  # Dense index of a cell, -1 for closed cells
+        self.index[self.cells[:, 0], self.cells[:, 1]] = np.arange(self.size, dtype=np.int32)
+
+        self.next = np.empty((len(ACTIONS), self.size), dtype=np.int32)
+        own = np.arange(self.size, dtype=np.int32)
+        for a, action in enumerate(ACTIONS):
+            dx, dy = ACTION_OFFSETS[action]
+            tx = self.cells[:, 0] + dx
+            ty = self.cells[:, 1] + dy
+            in_bounds = (tx >= 0) & (tx < n) & (ty >= 0) & (ty < n)
+            target = np.full(self.size, -1, dtype=np.int32)
+            target[in_bounds] = self.index[tx[in_bounds], ty[in_bounds]]
+            # If next cell is open, move there. Otherwise, stay put.
+            self.next[a] = np.where(target >= 0, target, own)
+
+        # Random 64 bit key per cell, a belief's fingerprint is the XOR of the keys of its cells (Zobrist hashing).
+        # Seeded from the layout so every process derives the same keys without touching the global RNG.
+        rng = np.random.default_rng(n * 1000003 + self.size)
+        self.zobrist = rng.integers(0, np.iinfo(np.uint64).max, size=self.size, dtype=np.uint64, endpoint=True)
+        # Plain list copies for BeliefSet's small-belief path, indexing numpy arrays one cell at a time is slow
+        self.next_lists = self.next.tolist()
+        self.zobrist_keys = self.zobrist.tolist()
+
+    def indexOf(self, cell: tuple) -> int:
+        x, y = cell
+        if 0 <= x < self.n and 0 <= y < self.n:
+            return int(self.index[x, y])
+        return -1
+
+    def cellAt(self, i: int) -> tuple:
+        x, y = self.cells[i]
+        return int(x), int(y)
+
+    def nextCell(self, cell: tuple, action) -> tuple:
+        return self.cellAt(self.next[self.action_index[action], self.indexOf(cell)])
+
+
+_table_cache = {}  # (n, frozenset of open cells) -> TransitionTable, shared by every graph in the process
+_TABLE_CACHE_LIMIT = 8
+
+
+def tableForLayout(n: int, open_cells) -> TransitionTable:
+    """Returns the cached table of a layout, so graphs re-created for the same ship don't rebuild it"""
+    key = (n, frozenset(open_cells))
+    table = _table_cache.get(key)
+    if table is None:
+        if len(_table_cache) >= _TABLE_CACHE_LIMIT:
+            _table_cache.pop(next(iter(_table_cache)))
+        table = TransitionTable(n, key[1])
+        _table_cache[key] = table
+    return table
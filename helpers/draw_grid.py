@@ -1,56 +1,39 @@
-import pygame
+import time
 import constants as cnt
+import helpers.profiler as profiler
 
+_renderer = None  # GridRenderer, created on the first frame so headless runs never import pygame
 
-def draw_grid(screen, game, n):
-    if not screen: return
-    screen.fill(cnt.WHITE)
-    font = pygame.font.SysFont(None, 30)
-    text = font.render(game.current_step, True, cnt.BLACK)
-    screen.blit(text, (20, 10))
-
-    for i in range(n):
-        for j in range(n):
-            x = j * (cnt.CELL_SIZE + cnt.MARGIN)
-            y = i * (cnt.CELL_SIZE + cnt.MARGIN) + cnt.HEADER_HEIGHT
-            node = (i, j)
-
-            # Start with white for open cells, black for closed
-            if game.Ship.nodes[node]['weight'] == cnt.CELL_OPENED:
-                color = cnt.WHITE
-            else:
-                color = cnt.BLACK
-
-            if game.step < 4:
-                if node in game.one_neighbour_set:
-                    color = cnt.YELLOW
-                if node in game.dead_ends:
-                    color = cnt.RED
-                if node in game.currently_open and (node not in game.dead_ends):
-                    color = cnt.GREEN
-            else:
 
-                if game.currLocalizer and node in game.currLocalizer.possible_locations:
-                    color = cnt.GREEN
-
-            pygame.draw.rect(screen, color, (x, y, cnt.CELL_SIZE, cnt.CELL_SIZE))
-            pygame.draw.rect(screen, cnt.GRAY, (x, y, cnt.CELL_SIZE, cnt.CELL_SIZE), 1)
-
-    # Rest of your code remains the same...
-    pygame.draw.rect(screen, cnt.BLUE, (cnt.SCREEN_SIZE[0] // 2 - 50, cnt.SCREEN_SIZE[1] - 40, 100, 30))
-    message = "Proceed" if game.canProceed else "Loading ..."
-    if game.game_over: message = "Restart"
-    text = font.render(message, True, cnt.WHITE)
-    screen.blit(text, (cnt.SCREEN_SIZE[0] // 2 - 30, cnt.SCREEN_SIZE[1] - 35))
+def draw_grid(screen, game, n, heatmap=None):
+    """
+    Draws the ship, repainting only cells that changed since the previous frame.
+    heatmap: optional (n, n) array of probabilities, open cells are then coloured with getColor's gradient.
+    """
+    if not screen: return
+    global _renderer
+    if _renderer is None:
+        from helpers.gridrenderer import GridRenderer
 
-    pygame.display.flip()
+        _renderer = GridRenderer()  # Keeps the previous frame to work out dirty cells
+    if profiler.ENABLED:
+        start = time.perf_counter()
+        _renderer.render(screen, game, n, heatmap)
+        profiler.addTime("render", time.perf_counter() - start)
+        return
+    _renderer.render(screen, game, n, heatmap)
 
 
 def draw_grid_internal(graph):
+    if graph.frame_listener is not None:
+        # Rendering happens on another thread, hand over the frame instead
+        graph.frame_listener(graph)
+        return
     draw_grid(graph.screen, graph, graph.n)
 
 
 def getColor(prob):
+    # Single cell version of gridrenderer.getColors
     # Special case: exactly 0 probability
     if prob == 0.0:
         return cnt.GRAY  # Or (128, 128, 128) if cnt.GRAY isn't defined
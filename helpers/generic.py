@@ -33,36 +33,14 @@ class HelperService:
     @staticmethod
     def getOpenNeighbourListForNode(graph, node: tuple, isIgnoreDiagonals: bool = False) -> list:
         directions = HelperService.nonDiagDirections(node) if isIgnoreDiagonals else HelperService.directions(node)
-
-        openNeighbours = []
-        grid_size = cnt.GRID_SIZE  # Assuming this exists
-
-        for newX, newY in directions:
-            # Check bounds first
-            if 0 <= newX < grid_size and 0 <= newY < grid_size:
-                nodeAtDxDy = graph.Ship.nodes.get((newX, newY), None)
-                if nodeAtDxDy and nodeAtDxDy['weight'] == cnt.CELL_OPENED:
-                    openNeighbours.append((newX, newY))
-
-        return openNeighbours
+        open_mask = graph.getNeighbourhood().open_mask
+        return [(newX, newY) for newX, newY in directions
+                if 0 <= newX < graph.n and 0 <= newY < graph.n and open_mask[newX, newY]]
 
     @staticmethod
     def getClosedNeighborCount(graph, node: tuple) -> int:
-        """Counts actual blocked/closed neighbors (more reliable than 8 - open)"""
-        directions = HelperService.directions(node)
-        grid_size = cnt.GRID_SIZE
-        closed_count = 0
-
-        for newX, newY in directions:
-            if 0 <= newX < grid_size and 0 <= newY < grid_size:
-                node_data = graph.Ship.nodes.get((newX, newY), None)
-                if not node_data or node_data['weight'] == cnt.CELL_CLOSED:
-                    closed_count += 1
-            else:
-                # Count out-of-bounds as closed
-                closed_count += 1
-
-        return closed_count
+        """Closed 8-neighbours of a cell of the grid, out-of-bounds ones count as closed"""
+        return int(graph.getNeighbourhood().closed_counts[node])
 
     @staticmethod
     def pickACellWithHighestRatProbability(pd1: dict, pd2: dict):
@@ -0,0 +1,163 @@
+import numpy as np
+import pygame
+import constants as cnt
+
+_fonts = dict()  # size -> pygame font, SysFont is slow to create
+
+
+def getFont(size: int = 30):
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.SysFont(None, size)
+        _fonts[size] = font
+    return font
+
+
+def getColors(probs):
+    """Vectorized getColor: (..., 3) uint8 colours for an array of probabilities"""
+    probs = np.asarray(probs, dtype=np.float64)
+    clamped = np.clip(probs, 0.0001, 1.0)
+    red = np.where(clamped < 0.5, (510 * clamped).astype(np.int64), 255)
+    green = np.where(clamped < 0.5, 255, (510 * (1 - clamped)).astype(np.int64))
+    colours = np.stack([np.clip(red, 0, 255), np.clip(green, 0, 255), np.zeros_like(red)], axis=-1)
+    colours[probs == 0.0] = cnt.GRAY
+    return colours.astype(np.uint8)
+
+
+def cellMask(n: int, cells):
+    """(n, n) boolean mask of a collection of (x, y) cells, BeliefSets are converted without iterating"""
+    mask = np.zeros((n, n), dtype=bool)
+    if cells is None:
+        return mask
+    if hasattr(cells, 'table') and hasattr(cells, 'mask'):
+        coordinates = cells.table.cells[cells.mask]
+    else:
+        coordinates = np.asarray(list(cells), dtype=np.int64).reshape(-1, 2)
+    mask[coordinates[:, 0], coordinates[:, 1]] = True
+    return mask
+
+
+class GridRenderer:
+    """
+    Draws the ship onto a pygame screen.
+    Cell colours are computed as one (n, n, 3) array per frame; only cells whose colour changed are
+    repainted and pushed to the display as dirty rects. The background (margins and cell borders) and
+    fonts are cached, full repaints build the whole grid in one surfarray blit.
+    """
+
+    FULL_REDRAW_SHARE = 0.25  # Repaint the grid in bulk when more than this share of cells changed
+    COLOUR_KEY = (255, 0, 255)  # Transparent colour of the border overlay, not used by any cell
+
+    def __init__(self):
+        self.screen = None
+        self.geometry = None
+        self.background: pygame.Surface = None
+        self.colours = None  # Cell colours currently on screen
+        self.header = None  # (step label, button label) currently on screen
+
+    def _layout(self, screen, n):
+        geometry = (n, cnt.CELL_SIZE, cnt.MARGIN, cnt.HEADER_HEIGHT, tuple(cnt.SCREEN_SIZE), screen.get_size())
+        if screen is self.screen and geometry == self.geometry:
+            return False
+        self.screen = screen
+        self.geometry = geometry
+        self.pitch = cnt.CELL_SIZE + cnt.MARGIN
+        self.button_rect = pygame.Rect(cnt.SCREEN_SIZE[0] // 2 - 50, cnt.SCREEN_SIZE[1] - 40, 100, 30)
+
+        # Pixel -> cell lookup along one axis of the grid area, margins map to an extra white cell n
+        offsets = np.arange(n * self.pitch) % self.pitch
+        inside = offsets < cnt.CELL_SIZE
+        self.pixel_cell = np.where(inside, np.arange(n * self.pitch) // self.pitch, n)
+        edge = inside & ((offsets == 0) | (offsets == cnt.CELL_SIZE - 1))
+        border = (inside[:, None] & inside[None, :]) & (edge[:, None] | edge[None, :])
+
+        # The 1px cell borders as an overlay, everything else is transparent through the colour key
+        pixels = np.empty((n * self.pitch, n * self.pitch, 3), dtype=np.uint8)
+        pixels[...] = self.COLOUR_KEY
+        pixels[border] = cnt.GRAY
+        self.borders = pygame.Surface((n * self.pitch, n * self.pitch))
+        pygame.surfarray.blit_array(self.borders, pixels)
+        self.borders.set_colorkey(self.COLOUR_KEY)
+
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(cnt.WHITE)
+        self.background.blit(self.borders, (0, cnt.HEADER_HEIGHT))
+        self.colours = None
+        self.header = None
+        return True
+
+    def cellColours(self, game, n, heatmap=None):
+        """(n, n, 3) uint8 colour of every cell, same rules as the per-cell checks it replaces"""
+        open_mask = game.Ship.openMask()[:n, :n]
+        colours = np.empty((n, n, 3), dtype=np.uint8)
+        colours[...] = cnt.BLACK
+        colours[open_mask] = cnt.WHITE
+
+        if game.step < 4:
+            colours[cellMask(n, game.one_neighbour_set)] = cnt.YELLOW
+            dead_ends = cellMask(n, game.dead_ends)
+            colours[dead_ends] = cnt.RED
+            # currently_open holds exactly the open cells, the grid says the same without iterating the set
+            colours[open_mask & ~dead_ends] = cnt.GREEN
+        elif heatmap is not None:
+            heat = getColors(heatmap)
+            colours[open_mask] = heat[open_mask]
+        elif game.currLocalizer:
+            colours[cellMask(n, game.currLocalizer.possible_locations)] = cnt.GREEN
+        return colours
+
+    def _cellRect(self, i, j):
+        # Inner area of the cell, its border comes from the background
+        return pygame.Rect(j * self.pitch + 1, i * self.pitch + cnt.HEADER_HEIGHT + 1,
+                           cnt.CELL_SIZE - 2, cnt.CELL_SIZE - 2)
+
+    def _paintGrid(self, colours):
+        n = len(colours)
+        padded = np.empty((n + 1, n + 1, 3), dtype=np.uint8)
+        padded[...] = cnt.WHITE
+        padded[:n, :n] = colours.transpose(1, 0, 2)  # surfarray is indexed (x, y)
+        pixels = np.take(np.take(padded, self.pixel_cell, axis=0), self.pixel_cell, axis=1)
+        grid = pygame.Surface((n * self.pitch, n * self.pitch))
+        pygame.surfarray.blit_array(grid, pixels)
+        grid.blit(self.borders, (0, 0))
+        return self.screen.blit(grid, (0, cnt.HEADER_HEIGHT))
+
+    def _paintHeader(self, header):
+        font = getFont(30)
+        screen = self.screen
+        step_label, message = header
+        header_rect = pygame.Rect(0, 0, screen.get_width(), cnt.HEADER_HEIGHT)
+        screen.blit(self.background, header_rect, header_rect)
+        screen.blit(font.render(step_label, True, cnt.BLACK), (20, 10))
+
+        pygame.draw.rect(screen, cnt.BLUE, self.button_rect)
+        screen.blit(font.render(message, True, cnt.WHITE), (cnt.SCREEN_SIZE[0] // 2 - 30, cnt.SCREEN_SIZE[1] - 35))
+        return [header_rect, self.button_rect]
+
+    def render(self, screen, game, n, heatmap=None):
+        full = self._layout(screen, n)
+        colours = self.cellColours(game, n, heatmap)
+        message = "Restart" if game.game_over else ("Proceed" if game.canProceed else "Loading ...")
+        header = (game.current_step, message)
+
+        if full:
+            screen.blit(self.background, (0, 0))
+            self._paintGrid(colours)
+            self._paintHeader(header)
+            pygame.display.flip()
+        else:
+            dirty = []
+            changed = np.argwhere(np.any(colours != self.colours, axis=2))
+            if len(changed) > self.FULL_REDRAW_SHARE * n * n:
+                dirty.append(self._paintGrid(colours))
+            else:
+                for i, j in changed.tolist():
+                    dirty.append(screen.fill(colours[i, j], self._cellRect(i, j)))
+            # The button sits on top of the last grid row, repaint it when cells underneath changed
+            if header != self.header or self.button_rect.collidelist(dirty) != -1:
+                dirty.extend(self._paintHeader(header))
+            if dirty:
+                pygame.display.update(dirty)
+
+        self.colours = colours
+        self.header = header
@@ -0,0 +1,45 @@
+import random
+
+
+class IndexedSet:
+    """
+    Set with O(1) add, remove and uniform random choice.
+    Items live in a list, a dict maps each item to its position and removal swaps the last item into the hole.
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = dict()
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item):
+        pos = self.positions.pop(item)
+        last = self.items.pop()
+        if pos < len(self.items):
+            self.items[pos] = last
+            self.positions[last] = pos
+
+    def discard(self, item):
+        if item in self.positions:
+            self.remove(item)
+
+    def choice(self, rng=random):
+        return self.items[rng.randrange(len(self.items))]
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __repr__(self):
+        return f"IndexedSet({self.items!r})"
@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def _neighbourSums(mask):
+    """Number of True 4-neighbours and of True 8-neighbours of every cell, cells outside the grid count as False"""
+    p = np.pad(mask.astype(np.int8), 1)
+    orthogonal = p[:-2, 1:-1] + p[2:, 1:-1] + p[1:-1, :-2] + p[1:-1, 2:]
+    return orthogonal, orthogonal + p[:-2, :-2] + p[:-2, 2:] + p[2:, :-2] + p[2:, 2:]
+
+
+class NeighbourhoodAnalysis:
+    """
+    Whole-grid neighbour statistics computed in one pass of array shifts.
+    Mirrors the per-cell HelperService / ManhattanGraph walks:
+    - open_counts: open 4-neighbours of every cell (ManhattanGraph.isNodeIsolated)
+    - dead_ends: open cells with exactly one open 4-neighbour
+    - closed_counts: closed or out-of-bounds 8-neighbours (HelperService.getClosedNeighborCount)
+    - eligible: closed interior cells the ship may expand into (HelperService.getEligibleNeighbours)
+    - frontier: eligible cells touching at least one open cell
+    """
+
+    def __init__(self, open_mask):
+        self.open_mask = open_mask
+        self.open_counts, open_counts_diag = _neighbourSums(open_mask)
+        self.dead_ends = open_mask & (self.open_counts == 1)
+        self.closed_counts = 8 - open_counts_diag
+
+        interior = np.zeros_like(open_mask)
+        interior[1:-1, 1:-1] = True
+        self.eligible = interior & ~open_mask
+        self.frontier = self.eligible & (self.open_counts >= 1)
+
+    def deadEndCells(self) -> list:
+        xs, ys = np.nonzero(self.dead_ends)
+        return list(zip(xs.tolist(), ys.tolist()))
@@ -0,0 +1,162 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+import constants as cnt
+
+# Off unless cnt.PROFILE is set or LOCALIZATION_PROFILE is in the environment. Instrumented code checks
+# ENABLED before doing anything, so a disabled profiler costs one attribute lookup per call site.
+ENABLED = bool(getattr(cnt, 'PROFILE', False)) or os.environ.get('LOCALIZATION_PROFILE', '0') not in ('', '0')
+
+
+class Stats:
+    """Timers (seconds) and counters (any value) as name -> [count, total, max]"""
+
+    def __init__(self):
+        self.timers = dict()
+        self.counters = dict()
+
+    @staticmethod
+    def _add(table: dict, name: str, value, count: int = 1):
+        entry = table.get(name)
+        if entry is None:
+            table[name] = [count, value, value]
+        else:
+            entry[0] += count
+            entry[1] += value
+            if value > entry[2]:
+                entry[2] = value
+
+    def addTime(self, name: str, seconds: float):
+        self._add(self.timers, name, seconds)
+
+    def count(self, name: str, value=1):
+        self._add(self.counters, name, value)
+
+    def merge(self, other: dict):
+        """Adds a snapshot() of another Stats, e.g. from a pool worker"""
+        for kind in ('timers', 'counters'):
+            table = getattr(self, kind)
+            for name, (count, total, peak) in other[kind].items():
+                entry = table.get(name)
+                if entry is None:
+                    table[name] = [count, total, peak]
+                else:
+                    entry[0] += count
+                    entry[1] += total
+                    entry[2] = max(entry[2], peak)
+
+    def snapshot(self) -> dict:
+        return {'timers': {k: list(v) for k, v in self.timers.items()},
+                'counters': {k: list(v) for k, v in self.counters.items()}}
+
+    def __bool__(self):
+        return bool(self.timers or self.counters)
+
+
+class Profiler:
+    """
+    Process-wide collector. `current` holds the running episode; endEpisode() folds it into `totals`
+    (per call statistics) and `per_episode` (statistics of each metric's per-episode total).
+    """
+
+    def __init__(self):
+        self.current = Stats()
+        self.totals = Stats()
+        self.per_episode = Stats()
+        self.episodes = 0
+
+    def endEpisode(self):
+        if not self.current:
+            return
+        for kind in ('timers', 'counters'):
+            table = getattr(self.per_episode, kind)
+            for name, (_, total, _) in getattr(self.current, kind).items():
+                Stats._add(table, name, total)
+        self.totals.merge(self.current.snapshot())
+        self.current = Stats()
+        self.episodes += 1
+
+    def snapshot(self) -> dict:
+        """Everything recorded so far, the running episode included, as plain lists (picklable, JSON-able)"""
+        self.endEpisode()
+        return {'episodes': self.episodes, 'totals': self.totals.snapshot(), 'per_episode': self.per_episode.snapshot()}
+
+    def merge(self, snapshot: dict):
+        self.episodes += snapshot['episodes']
+        self.totals.merge(snapshot['totals'])
+        self.per_episode.merge(snapshot['per_episode'])
+
+    def reset(self):
+        self.__init__()
+
+
+_profiler = Profiler()
+
+
+def enable(flag: bool = True):
+    """Switches instrumentation at runtime, pool workers started afterwards inherit it"""
+    global ENABLED
+    ENABLED = flag
+    os.environ['LOCALIZATION_PROFILE'] = '1' if flag else '0'
+
+
+def addTime(name: str, seconds: float):
+    _profiler.current.addTime(name, seconds)
+
+
+def count(name: str, value=1):
+    _profiler.current.count(name, value)
+
+
+@contextmanager
+def timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profiler.current.addTime(name, time.perf_counter() - start)
+
+
+def endEpisode():
+    if ENABLED:
+        _profiler.endEpisode()
+
+
+def snapshot() -> dict:
+    return _profiler.snapshot()
+
+
+def merge(snapshot: dict):
+    _profiler.merge(snapshot)
+
+
+def reset():
+    _profiler.reset()
+
+
+def _summary(stats: dict) -> dict:
+    return {name: {'count': count, 'total': total, 'mean': total / count if count else 0.0, 'max': peak}
+            for name, (count, total, peak) in sorted(stats.items())}
+
+
+def report() -> dict:
+    data = snapshot()
+    return {
+        'episodes': data['episodes'],
+        'timers': _summary(data['totals']['timers']),
+        'counters': _summary(data['totals']['counters']),
+        'per_episode': {'timers': _summary(data['per_episode']['timers']),
+                        'counters': _summary(data['per_episode']['counters'])},
+    }
+
+
+def export(path: str = None) -> str:
+    """Writes report() as JSON to path (default cnt.PROFILE_PATH), returns the path"""
+    path = path or getattr(cnt, 'PROFILE_PATH', None) or "profile.json"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report(), file, indent=1)
+    return path
@@ -1,5 +1,4 @@
 import os
-import pandas as pd
 import numpy as np
 import joblib
 from sklearn.pipeline import Pipeline
@@ -8,13 +7,22 @@ from sklearn.preprocessing import StandardScaler, PolynomialFeatures
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
+from parts.costmodel import exportCostModel
+from data.aggregate import StepAggregate
+import constants as cnt
+from data.report import PART3_GENERATORS, STORE_PATH
+from data.store import ExperimentStore, iterSizesAndSteps, loadSizesAndSteps
 
 
-def loadDataFromFile(file_path="../data/data.txt"):
-    df = pd.read_csv(file_path, header=None, names=["L_size", "steps"])
-    X = df[["L_size"]].values
-    y = df["steps"].values
-    return X, y
+def storeFilters() -> dict:
+    """Store runs part3 trains and plots on: generate_data episodes of the current strategy"""
+    return {'strategy': cnt.CURRENT_PART, 'generator': PART3_GENERATORS}
+
+
+def loadData(file_path="../data/data.txt", store_path=STORE_PATH):
+    """Legacy text results plus every localized part3 episode in the experiment store"""
+    sizes, steps = loadSizesAndSteps(file_path, ExperimentStore(store_path), **storeFilters())
+    return sizes.reshape(-1, 1), steps
 
 
 def trainModel(X, y, degree=3):
@@ -52,16 +60,10 @@ def plotTrainingVSTestLoss(model, X, y):
     plt.show()
 
 
-def plotActualVsPredictedStepsToLocalize(model, X, y):
-    from collections import defaultdict
-
-    data = defaultdict(list)
-    for xi, yi in zip(X.flatten(), y):
-        data[int(xi)].append(yi)
-
-    L_sizes = sorted(data.keys())
-    avg_actual = [np.mean(data[k]) for k in L_sizes]
-    avg_predicted = [np.mean(model.predict(np.full((10, 1), k))) for k in L_sizes]
+def plotActualVsPredictedStepsToLocalize(model, aggregate: StepAggregate):
+    L_sizes = aggregate.sizes()
+    avg_actual = aggregate.mean()
+    avg_predicted = model.predict(L_sizes.reshape(-1, 1))  # One call for every L size
 
     plt.figure(figsize=(8, 6))
     plt.plot(L_sizes, avg_actual, 'b-', marker='o', label='Actual Avg Steps')
@@ -76,9 +78,9 @@ def plotActualVsPredictedStepsToLocalize(model, X, y):
 
 
 if __name__ == '__main__':
-    x, y = loadDataFromFile()
     DATA_PATH = "../data/data.txt"
     MODEL_PATH = "../model/model1.joblib"
+    x, y = loadData(DATA_PATH)
     isTrain = False  # Toggle this to False to run plots
 
     if isTrain:
@@ -86,13 +88,17 @@ if __name__ == '__main__':
         model = trainModel(X_train, y_train, degree=3)
         os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
         joblib.dump(model, MODEL_PATH)
+        exportCostModel(model, MODEL_PATH)  # sklearn-free evaluator used by Localizer3
         print("Train MSE:", mean_squared_error(y_train, model.predict(X_train)))
         print("Test MSE:", mean_squared_error(y_test, model.predict(X_test)))
     else:
         try:
             model = joblib.load(MODEL_PATH)
             plotTrainingVSTestLoss(model, x, y)
-            plotActualVsPredictedStepsToLocalize(model, x, y)
+            # Streams the sources again instead of binning x, y in Python
+            aggregate = StepAggregate.fromChunks(
+                iterSizesAndSteps(DATA_PATH, ExperimentStore(STORE_PATH), **storeFilters()))
+            plotActualVsPredictedStepsToLocalize(model, aggregate)
         except:
             print("Model not found! Run train first!")
             pass
\ No newline at end of file
@@ -1,46 +1,84 @@
-import multiprocessing
 import os
 import random
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import joblib
-from collections import defaultdict
 import tqdm
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import RidgeCV
 from sklearn.preprocessing import PolynomialFeatures, StandardScaler
 from sklearn.metrics import mean_squared_error
+from parts.costmodel import exportCostModel
 from sklearn.model_selection import train_test_split
 import constants as cnt
-from game.auto_game import auto_game
-from graph.sample.sample1 import currently_open_1
-
-
-def worker(_):
-    """Worker to run one episode of π1 data generation."""
-    try:
-        L = random.sample(list(currently_open_1), random.randint(20, 80))
-        g = auto_game(bot_type=cnt.CURRENT_PART, isUseIpCells=True, open_cells=L)
-        return f"{len(L)},{g.t}\n"
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        return None
+from parts.localizer3 import DEFAULT_MODEL_PATH
+from game.batch_game import batch_game
+from game.shared_ship import SharedShip, mergeAnalysisForWorkers
+from graph.mergeability import synchronizes
+from graph.transitions import tableForLayout
+from data.scheduler import GenerationScheduler
+from data.store import ExperimentStore, iterSizesAndSteps, loadSizesAndSteps
+from data.aggregate import StepAggregate
+from parts.policycache import PolicyCache, policyCachePath
+from graph.shiplibrary import defaultShip, defaultShipSize, shipHash
+import helpers.profiler as profiler
 
 
 def generate_pi1_data_parallel(num_points=100):
-    """Generate π1 data points in parallel and save to file."""
-    with multiprocessing.Pool() as pool, open(DATA_PATH, "a+") as f:
-        for result in tqdm.tqdm(pool.imap(worker, range(num_points)), total=num_points, desc="Generating π₁ data"):
-            if result:
-                f.write(result)
-                f.flush()
-    print(f"[DONE] Saved {num_points} episodes to {DATA_PATH}")
+    """Generate π1 data points in parallel and save them to the experiment store."""
+    model_paths = [DEFAULT_MODEL_PATH] if cnt.CURRENT_PART == 3 else []
+    open_cells, dead_ends = defaultShip()
+    n = defaultShipSize()
+    config = {'generator': 'pi1', 'ship_hash': shipHash(n, open_cells), 'strategy': cnt.CURRENT_PART,
+              'grid_size': n, 'num_points': num_points}
+    if getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1:
+        config['lookahead_depth'] = cnt.LOOKAHEAD_DEPTH
+    policy, policy_path = None, None
+    if getattr(cnt, 'POLICY_CACHE', False):
+        config['policy_cache'] = True
+        policy_path = policyCachePath(shipHash(n, open_cells), cnt.CURRENT_PART)
+        policy = PolicyCache.load(policy_path)
+    run = ExperimentStore(STORE_PATH).resumeOrCreate(config)
+    done = run.completedSeeds()
+    # L size is derived from the seed so a resumed run regenerates exactly the same tasks
+    params = [(seed, random.Random(seed).randint(20, 80)) for seed in range(run.base_seed, run.base_seed + num_points)
+              if seed not in done]
+    table = tableForLayout(n, open_cells)
+    analysis = mergeAnalysisForWorkers(table, cnt.CURRENT_PART)
+    with SharedShip(n, open_cells, dead_ends, synchronizes(table), analysis) as ship, \
+            GenerationScheduler(ship.descriptor, model_paths,
+                                policy_cache=policy, policy_path=policy_path) as scheduler, \
+            tqdm.tqdm(total=len(params), desc="Generating π₁ data") as bar:
+        saved = scheduler.run(params, run, bar)
+    if policy is not None:
+        policy.save(policy_path)
+    run.finish()
+    print(f"[DONE] Saved {saved} episodes to {STORE_PATH} (run {run.run_id})")
+    if profiler.ENABLED:
+        print(f"[DONE] Profile written to {profiler.export()}")
+
+def generate_pi1_data_batched(num_points=100):
+    """Generate π1 data points with the lockstep batch simulator and save them to the experiment store."""
+    open_cells, _ = defaultShip()
+    n = defaultShipSize()
+    config = {'generator': 'pi1-batched', 'ship_hash': shipHash(n, open_cells), 'strategy': cnt.CURRENT_PART,
+              'grid_size': n, 'num_points': num_points}
+    run = ExperimentStore(STORE_PATH).resumeOrCreate(config)
+    if not run.completedSeeds():
+        L_sizes = [random.Random(run.base_seed + i).randint(20, 80) for i in range(num_points)]
+        results = batch_game(bot_type=cnt.CURRENT_PART, L_sizes=L_sizes, isUseIpCells=True, seed=run.base_seed)
+        run.write([(run.base_seed + i, L_size, steps, status) for i, (L_size, steps, status) in enumerate(results)])
+        print(f"[DONE] Saved {len(results)} episodes to {STORE_PATH} (run {run.run_id})")
+    run.finish()
+
+def load_pi1_data():
+    """Legacy text results plus every localized π₁ episode in the experiment store."""
+    sizes, steps = loadSizesAndSteps(DATA_PATH, ExperimentStore(STORE_PATH), strategy=cnt.CURRENT_PART,
+                                     generator=('pi1', 'pi1-batched'))
+    return sizes.reshape(-1, 1), steps
 
 def train_pi1_model():
-    df = pd.read_csv(DATA_PATH, header=None, names=["L_size", "steps"])
-    X = df[["L_size"]].values
-    y = df["steps"].values
+    X, y = load_pi1_data()
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -53,6 +91,7 @@ def train_pi1_model():
 
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
     joblib.dump(model, MODEL_PATH)
+    exportCostModel(model, MODEL_PATH)  # sklearn-free evaluator used by Localizer3
 
     print("Model trained and saved to", MODEL_PATH)
     print("Train MSE:", mean_squared_error(y_train, model.predict(X_train)))
@@ -61,19 +100,15 @@ def train_pi1_model():
 
 # --- MODE: Plot Predicted vs Actual ---
 def plot_pi1_predictions():
-    df = pd.read_csv(DATA_PATH, header=None, names=["L_size", "steps"])
-    X = df[["L_size"]].values
-    y = df["steps"].values
+    aggregate = StepAggregate.fromChunks(
+        iterSizesAndSteps(DATA_PATH, ExperimentStore(STORE_PATH), strategy=cnt.CURRENT_PART,
+                          generator=('pi1', 'pi1-batched')))
 
     model = joblib.load(MODEL_PATH)
 
-    binned = defaultdict(list)
-    for xi, yi in zip(X.flatten(), y):
-        binned[int(xi)].append(yi)
-
-    sizes = sorted(binned.keys())
-    avg_actual = [np.mean(binned[k]) for k in sizes]
-    avg_predicted = [np.mean(model.predict(np.full((10, 1), k))) for k in sizes]
+    sizes = aggregate.sizes()
+    avg_actual = aggregate.mean()
+    avg_predicted = model.predict(sizes.reshape(-1, 1))  # One call for every L size
 
     plt.figure(figsize=(8, 6))
     plt.plot(sizes, avg_actual, 'b-o', label='Actual Avg Steps')
@@ -89,16 +124,19 @@ def plot_pi1_predictions():
 
 if __name__ == "__main__":
     DATA_PATH = "../data/data_p4.txt"
+    STORE_PATH = "../data/experiments"
     MODEL_PATH = "../model/model2.joblib"
-    MODE = "plot"  # Options: "generate", "train", "plot"
+    MODE = "plot"  # Options: "generate", "generate_batched", "train", "plot"
     ITERATIONS = 10
     DEGREE = 3
 
     if MODE == "generate":
         generate_pi1_data_parallel(num_points=10000)
+    elif MODE == "generate_batched":
+        generate_pi1_data_batched(num_points=10000)
     elif MODE == "train":
         train_pi1_model()
     elif MODE == "plot":
         plot_pi1_predictions()
     else:
-        raise ValueError("Invalid MODE. Choose from: generate, train, plot.")
+        raise ValueError("Invalid MODE. Choose from: generate, generate_batched, train, plot.")
@@ -0,0 +1,170 @@
+import time
+from array import array
+import numpy as np
+import helpers.profiler as profiler
+
+
+class BeliefSet:
+    """
+    Set of cells the bot may currently be in, stored as a boolean vector over the
+    ship's dense cell numbering (see graph.transitions.TransitionTable).
+    Behaves like the set of (x, y) tuples it replaces for `in`, `len`, iteration and printing.
+
+    Small beliefs (see isSparse()) are kept as a sorted tuple of their cell indices instead and moved with plain
+    Python: at a few dozen cells numpy's per-call overhead costs more than the work, and the mask is only built
+    when something asks for it.
+    """
+
+    def __init__(self, table, mask=None, sparse: tuple = None):
+        self.table = table  # Shared between all beliefs of a ship, never modified
+        self._mask = mask
+        self._sparse = sparse  # Sorted dense indices of the cells, for small beliefs
+        self._indices = None
+        self._size = len(sparse) if sparse is not None else None
+        self._fingerprint = None
+
+    @staticmethod
+    def fromShip(ship, cells=None):
+        table = ship.getTransitionTable()
+        if cells is None:
+            return BeliefSet(table, np.ones(table.size, dtype=bool))
+        mask = np.zeros(table.size, dtype=bool)
+        indices = [table.indexOf(cell) for cell in cells]
+        mask[[i for i in indices if i >= 0]] = True
+        return BeliefSet(table, mask)
+
+    @property
+    def mask(self):
+        if self._mask is None:
+            mask = np.zeros(self.table.size, dtype=bool)
+            mask[self.indices()] = True
+            self._mask = mask
+        return self._mask
+
+    def isSparse(self) -> bool:
+        """Small enough that its indices (4 bytes each) take no more room than the packed mask"""
+        return len(self) * 32 <= self.table.size
+
+    def _sparseIndices(self) -> tuple:
+        if self._sparse is None:
+            self._sparse = tuple(self.indices().tolist())
+        return self._sparse
+
+    def move(self, action):
+        """Belief after every candidate cell attempts `action`, blocked cells stay put"""
+        if profiler.ENABLED:
+            profiler.count("actions_evaluated")
+        a = self.table.action_index[action]
+        if self.isSparse():
+            targets = self.table.next_lists[a]
+            return BeliefSet(self.table, sparse=tuple(sorted({targets[i] for i in self._sparseIndices()})))
+        new_mask = np.zeros_like(self.mask)
+        new_mask[self.table.next[a][self.mask]] = True
+        return BeliefSet(self.table, new_mask)
+
+    def copy(self):
+        if self._mask is None:
+            return BeliefSet(self.table, sparse=self._sparse)  # Tuples are immutable already
+        return BeliefSet(self.table, self._mask.copy())
+
+    def indices(self):
+        if self._indices is None:
+            if self._sparse is not None:
+                self._indices = np.array(self._sparse, dtype=np.int64)
+            else:
+                self._indices = np.flatnonzero(self._mask)
+        return self._indices
+
+    def cells(self):
+        return [tuple(cell) for cell in self.table.cells[self.indices()].tolist()]
+
+    def fingerprint(self) -> int:
+        """Zobrist hash of the belief, equal beliefs on the same ship always share it"""
+        if self._fingerprint is None:
+            if self._sparse is not None:
+                keys = self.table.zobrist_keys
+                fingerprint = 0
+                for i in self._sparse:
+                    fingerprint ^= keys[i]
+                self._fingerprint = fingerprint
+            else:
+                self._fingerprint = int(np.bitwise_xor.reduce(self.table.zobrist[self._mask]))
+        return self._fingerprint
+
+    def packedKey(self) -> bytes:
+        """Exact identity of the belief, one bit per open cell"""
+        return np.packbits(self.mask).tobytes()
+
+    def exactKey(self) -> bytes:
+        """Exact identity of the belief in at most packedKey()'s size: its indices when sparse, else packedKey()"""
+        if self.isSparse():
+            return array('i', self._sparseIndices()).tobytes()
+        return self.packedKey()
+
+    def __len__(self):
+        if self._size is None:
+            self._size = int(np.count_nonzero(self.mask))
+        return self._size
+
+    def __contains__(self, cell):
+        i = self.table.indexOf(cell)
+        return i >= 0 and bool(self.mask[i])
+
+    def __iter__(self):
+        return iter(self.cells())
+
+    def __eq__(self, other):
+        if isinstance(other, BeliefSet):
+            if len(self) != len(other) or self.fingerprint() != other.fingerprint():
+                return False
+            if self._sparse is not None and other._sparse is not None:
+                return self._sparse == other._sparse
+            return np.array_equal(self.mask, other.mask)
+        return set(self.cells()) == other
+
+    def __hash__(self):
+        return self.fingerprint()
+
+    def __repr__(self):
+        return repr(set(self.cells()))
+
+
+class VisitedStates:
+    """
+    Loop detection for the localizers. Beliefs are looked up by fingerprint and confirmed
+    against their exact key (BeliefSet.exactKey), so a hash collision never reports an unseen state as visited.
+    Memory per state is bounded: the fingerprint plus at most |open cells| / 8 bytes.
+    """
+
+    def __init__(self):
+        self.states = dict()  # fingerprint -> exact key, or list of exact keys on collision
+
+    def add(self, belief: BeliefSet):
+        fingerprint = belief.fingerprint()
+        known = self.states.get(fingerprint)
+        key = belief.exactKey()
+        if known is None:
+            self.states[fingerprint] = key
+        elif isinstance(known, list):
+            if key not in known:
+                known.append(key)
+        elif known != key:
+            self.states[fingerprint] = [known, key]
+
+    def __contains__(self, belief: BeliefSet):
+        if profiler.ENABLED:
+            start = time.perf_counter()
+            found = self._contains(belief)
+            profiler.addTime("visited.lookup", time.perf_counter() - start)
+            return found
+        return self._contains(belief)
+
+    def _contains(self, belief: BeliefSet):
+        known = self.states.get(belief.fingerprint())
+        if known is None:
+            return False
+        key = belief.exactKey()
+        return key in known if isinstance(known, list) else key == known
+
+    def __len__(self):
+        return sum(len(v) if isinstance(v, list) else 1 for v in self.states.values())
@@ -0,0 +1,83 @@
+import os
+import time
+import numpy as np
+import helpers.profiler as profiler
+
+
+class CostModel:
+    """
+    Lightweight evaluator of the trained StandardScaler -> PolynomialFeatures -> Ridge pipelines.
+    The only feature is |L|, so the pipeline collapses to one polynomial in z = (|L| - mean) / scale.
+    Predictions for sizes 0..max seen |L| come from a lookup table that grows on demand.
+    """
+
+    def __init__(self, mean: float, scale: float, coefficients):
+        self.mean = float(mean)
+        self.scale = float(scale)
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)  # Highest power first, as np.polyval expects
+        self.table = np.empty(0, dtype=np.float64)
+
+    @staticmethod
+    def fromPipeline(pipeline):
+        scaler, poly, regressor = [step for _, step in pipeline.steps]
+        if scaler.mean_.shape != (1,):
+            raise ValueError("CostModel only supports pipelines trained on the single L_size feature")
+
+        degree = int(poly.powers_.max())
+        coefficients = np.zeros(degree + 1)
+        coef = np.ravel(regressor.coef_)
+        for power, c in zip(poly.powers_[:, 0], coef):
+            coefficients[degree - power] += c
+        coefficients[degree] += float(np.ravel(regressor.intercept_)[0])
+        return CostModel(scaler.mean_[0], scaler.scale_[0], coefficients)
+
+    @staticmethod
+    def load(path: str):
+        data = np.load(path)
+        return CostModel(data['mean'], data['scale'], data['coefficients'])
+
+    def save(self, path: str):
+        np.savez(path, mean=self.mean, scale=self.scale, coefficients=self.coefficients)
+
+    def _evaluate(self, sizes):
+        return np.polyval(self.coefficients, (np.asarray(sizes, dtype=np.float64) - self.mean) / self.scale)
+
+    def predict(self, sizes):
+        """Predicted steps to localize for every |L| in `sizes`, one vectorized call"""
+        if profiler.ENABLED:
+            start = time.perf_counter()
+            predictions = self._predict(sizes)
+            profiler.addTime("model.predict", time.perf_counter() - start)
+            return predictions
+        return self._predict(sizes)
+
+    def _predict(self, sizes):
+        sizes = np.asarray(sizes, dtype=np.int64).ravel()
+        if len(sizes) == 0:
+            return np.empty(0, dtype=np.float64)
+        largest = int(sizes.max())
+        if largest >= len(self.table):
+            self.table = self._evaluate(np.arange(max(largest + 1, 2 * len(self.table))))
+        return self.table[sizes]
+
+
+def costModelPath(model_path: str) -> str:
+    """Exported evaluator that sits next to a joblib pipeline"""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def exportCostModel(pipeline, model_path: str) -> CostModel:
+    """Converts a trained pipeline and saves it beside its joblib file, returns the evaluator"""
+    cost_model = CostModel.fromPipeline(pipeline)
+    cost_model.save(costModelPath(model_path))
+    return cost_model
+
+
+def loadCostModel(model_path: str) -> CostModel:
+    """Exported evaluator if present, else the joblib pipeline converted on the fly"""
+    exported = costModelPath(model_path)
+    if os.path.exists(exported):
+        return CostModel.load(exported)
+    import joblib
+
+    return CostModel.fromPipeline(joblib.load(model_path))
@@ -1,25 +1,28 @@
-import networkx as nx
-from graph.djikstras import compatibleGraph, djikstras, getPathFromATOB
+from graph.djikstras import NoPathError
 from helpers.generic import HelperService
+from parts.belief import BeliefSet
 
 
 class Localizer:
-    def __init__(self, ship, position=None):
+    def __init__(self, ship, position=None, possible_locations: BeliefSet = None):
         self.ship = ship
         self.position = position
         self.actions = ["UP", "DOWN", "LEFT", "RIGHT"]
-        self.possible_locations = self.ship.currently_open.copy()
+        # Beliefs are never modified in place, so strategies may share one instead of copying
+        self.possible_locations = possible_locations if possible_locations is not None else BeliefSet.fromShip(self.ship)
 
     def localize(self):
         pass
 
+    def replayed(self, before: BeliefSet, after: BeliefSet):
+        """A move chosen outside the strategy (a policy cache hit) took the belief from before to after"""
+        self.possible_locations = after
+
     def isLocalized(self):
         return len(self.possible_locations) == 1
 
     def calculatePath(self, start, target: tuple):
-        ship = self.ship.Ship
-        adj_list = list(ship.adjacency())
-        comp_graph = compatibleGraph(ship, adj_list)
+        comp_graph = self.ship.paths.compatible()
 
         # Validate target exists in the compatible graph
         if target not in comp_graph:
@@ -27,10 +30,8 @@ class Localizer:
             return []
 
         try:
-            queue = djikstras(comp_graph, startNode=start)
-            path = getPathFromATOB(queue, start, target)
-            return path
-        except nx.NetworkXNoPath:
+            return self.ship.paths.path(start, target)
+        except NoPathError:
             HelperService.printDebug(f"No path exists from {start} to {target}!")
             return []
         except Exception as e:
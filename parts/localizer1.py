@@ -1,12 +1,12 @@
 import random
 from parts.localizer import Localizer
+from parts.belief import VisitedStates
 
 
 class Localizer1(Localizer):
-    def __init__(self, ship, position):
-        super().__init__(ship, position)
-        self.visited = set()
-        self.possible_locations = self.ship.currently_open.copy()
+    def __init__(self, ship, position, possible_locations=None):
+        super().__init__(ship, position, possible_locations)
+        self.visited = VisitedStates()
 
     def localize(self):
         action = self._getNextAction()
@@ -18,48 +18,24 @@ class Localizer1(Localizer):
             print(f"Localized after {self.ship.t} moves at location {self.possible_locations}")
             self.ship.step += 1
 
-    def _updatePossibleLocations(self, action):
-        new_possible_locations = set()
-
-        for loc in self.possible_locations:
-            next_loc = self._getNextLocation(loc, action)
-            new_possible_locations.add(next_loc)
-
-        self.possible_locations = new_possible_locations
-
-    def _getNextLocation(self, loc, action):
-        x, y = loc
-        potential_next = {
-            'UP': (x - 1, y),
-            'DOWN': (x + 1, y),
-            'LEFT': (x, y - 1),
-            'RIGHT': (x, y + 1),
-        }
-
-        next_cell = potential_next[action]
+    def replayed(self, before, after):
+        self.visited.add(before)
+        self.possible_locations = after
 
-        # If next cell is open, move there. Otherwise, stay put.
-        if next_cell in self.ship.currently_open:
-            return next_cell
-        else:
-            return loc
+    def _updatePossibleLocations(self, action):
+        self.possible_locations = self.possible_locations.move(action)
 
     def _getNextAction(self):
         action_candidates = []
         min_len = float('inf')
 
-        curr = self._location_set_to_str(self.possible_locations)
+        curr = self.possible_locations
 
         for action in self.actions:
-            new_locations = set()
-            for loc in self.possible_locations:
-                next_loc = self._getNextLocation(loc, action)
-                new_locations.add(next_loc)
-
-            newLocation = self._location_set_to_str(new_locations)
+            new_locations = self.possible_locations.move(action)
 
             # Ignore actions that don't change L or already seen
-            if newLocation == curr or newLocation in self.visited:
+            if new_locations == curr or new_locations in self.visited:
                 continue
 
             if len(new_locations) < min_len:
@@ -76,6 +52,3 @@ class Localizer1(Localizer):
         else:
             # All actions stall — fallback to a random move to break symmetry
             return random.choice(self.actions)
-
-    def _location_set_to_str(self, location_set):
-        return ",".join(sorted(f"{x}-{y}" for x, y in location_set))
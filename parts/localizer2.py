@@ -1,13 +1,18 @@
 import random
+import constants as cnt
 from parts.localizer import Localizer
+from parts.belief import VisitedStates
+from parts.planner import LookaheadPlanner
 
 
 class Localizer2(Localizer):
-    def __init__(self, ship, position=None):
-        super().__init__(ship, position)
+    def __init__(self, ship, position=None, possible_locations=None):
+        super().__init__(ship, position, possible_locations)
         self.target = self._choose_target()
-        self.visited = set()
-        self.possible_locations = self.ship.currently_open.copy()
+        self.visited = VisitedStates()
+        self.planner = None
+        if getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1:
+            self.planner = LookaheadPlanner(self.possible_locations.table)
 
     def localize(self):
         if self.isLocalized():
@@ -16,8 +21,13 @@ class Localizer2(Localizer):
             self.ship.step += 1
             return
 
-        current_state_str = self._location_set_to_str(self.possible_locations)
-        self.visited.add(current_state_str)
+        self.visited.add(self.possible_locations)
+
+        if self.planner is not None:
+            action = self.planner.plan(self.possible_locations, self.visited) or random.choice(self.actions)
+            self.possible_locations = self._simulate_action(self.possible_locations, action)
+            self.ship.t += 1
+            return
 
         best_action = None
         best_new_state = None
@@ -25,9 +35,7 @@ class Localizer2(Localizer):
 
         for action in self.actions:
             new_L = self._simulate_action(self.possible_locations, action)
-            new_state_str = self._location_set_to_str(new_L)
-
-            if new_state_str in self.visited:
+            if new_L in self.visited:
                 continue  # Already seen, skip
 
             if len(new_L) < min_len:
@@ -44,8 +52,12 @@ class Localizer2(Localizer):
 
         self.ship.t += 1
 
+    def replayed(self, before, after):
+        self.visited.add(before)
+        self.possible_locations = after
+
     def _simulate_action(self, locs, action):
-        return {self._get_next_location(loc, action) for loc in locs}
+        return locs.move(action)
 
     def _choose_target(self):
         candidates = list(self.ship.dead_ends)
@@ -61,17 +73,3 @@ class Localizer2(Localizer):
         if ty == fy + 1: return "RIGHT"
         if ty == fy - 1: return "LEFT"
         return random.choice(self.actions)  # fallback
-
-    def _get_next_location(self, loc, action):
-        x, y = loc
-        potential_next = {
-            'UP': (x - 1, y),
-            'DOWN': (x + 1, y),
-            'LEFT': (x, y - 1),
-            'RIGHT': (x, y + 1),
-        }
-        next_cell = potential_next[action]
-        return next_cell if next_cell in self.ship.currently_open else loc
-
-    def _location_set_to_str(self, location_set):
-        return ",".join(sorted(f"{x}-{y}" for x, y in location_set))
@@ -1,16 +1,26 @@
 import random
-import joblib
+import numpy as np
+import constants as cnt
 from parts.localizer import Localizer
+from parts.belief import VisitedStates
+from parts.planner import LookaheadPlanner
+from parts.modelregistry import getModel
 from parts.localizer1 import Localizer1  # π₀ strategy
 
+DEFAULT_MODEL_PATH = "../model/model1.joblib"
+
+
 class Localizer3(Localizer):
-    def __init__(self, ship, position=None, model_path="../model/model1.joblib"):
-        super().__init__(ship, position)
-        self.possible_locations = self.ship.currently_open.copy()
-        self.visited = set()
-        self.model = joblib.load(model_path)  # Load π₀ trained model
-        self.fallback = Localizer1(ship, position)  # Fallback to π₀ after first move
+    def __init__(self, ship, position=None, model_path=DEFAULT_MODEL_PATH, possible_locations=None):
+        super().__init__(ship, position, possible_locations)
+        self.visited = VisitedStates()
+        self.model = getModel(model_path)  # π₀ trained model, loaded once per process
+        self.fallback = Localizer1(ship, position, self.possible_locations)  # Fallback to π₀ after first move
         self.has_looked_ahead = False  # Track if π₁ logic has been used
+        self.planner = None
+        if getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1:
+            # Sequences scored by moves so far + π₀'s predicted steps, on every move instead of the first only
+            self.planner = LookaheadPlanner(self.possible_locations.table, cost=self.model.predict)
 
     def localize(self):
         if self.isLocalized():
@@ -19,7 +29,9 @@ class Localizer3(Localizer):
             self.ship.step += 1
             return
 
-        if not self.has_looked_ahead:
+        if self.planner is not None:
+            self._plan()
+        elif not self.has_looked_ahead:
             self._lookahead()
             self.has_looked_ahead = True
         else:
@@ -29,46 +41,31 @@ class Localizer3(Localizer):
 
         self.ship.t += 1
 
-    def _lookahead(self):
-        best_action = None
-        best_predicted_cost = float('inf')
-        best_new_L = None
-        current_state_str = self._location_set_to_str(self.possible_locations)
-        self.visited.add(current_state_str)
-
-        for action in self.actions:
-            new_L = {self._getNextLocation(loc, action) for loc in self.possible_locations}
-            new_state_str = self._location_set_to_str(new_L)
+    def replayed(self, before, after):
+        self.visited.add(before)
+        self.fallback.replayed(before, after)
+        self.has_looked_ahead = True  # The first move is made, later misses go to π₀ as usual
+        self.possible_locations = after
 
-            if new_state_str in self.visited:
-                continue
+    def _plan(self):
+        self.visited.add(self.possible_locations)
+        action = self.planner.plan(self.possible_locations, self.visited) or random.choice(self.actions)
+        self.possible_locations = self.possible_locations.move(action)
 
-            predicted_cost = self.model.predict([[len(new_L)]])[0]
+    def _lookahead(self):
+        self.visited.add(self.possible_locations)
 
-            if predicted_cost < best_predicted_cost:
-                best_predicted_cost = predicted_cost
-                best_action = action
-                best_new_L = new_L
+        candidates = []
+        for action in self.actions:
+            new_L = self.possible_locations.move(action)
+            if new_L not in self.visited:
+                candidates.append(new_L)
 
-        if best_action:
-            self.possible_locations = best_new_L
+        if candidates:
+            # Score every candidate in one call, ties go to the earliest action
+            predicted_costs = self.model.predict([len(new_L) for new_L in candidates])
+            self.possible_locations = candidates[int(np.argmin(predicted_costs))]
         else:
             # Fallback to random if all actions lead to visited or stagnant sets
             fallback_action = random.choice(self.actions)
-            self.possible_locations = {
-                self._getNextLocation(loc, fallback_action) for loc in self.possible_locations
-            }
-
-    def _getNextLocation(self, loc, action):
-        x, y = loc
-        potential_next = {
-            'UP': (x - 1, y),
-            'DOWN': (x + 1, y),
-            'LEFT': (x, y - 1),
-            'RIGHT': (x, y + 1),
-        }
-        next_cell = potential_next[action]
-        return next_cell if next_cell in self.ship.currently_open else loc
-
-    def _location_set_to_str(self, location_set):
-        return ",".join(sorted(f"{x}-{y}" for x, y in location_set))
+            self.possible_locations = self.possible_locations.move(fallback_action)
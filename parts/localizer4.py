@@ -0,0 +1,55 @@
+import random
+import numpy as np
+from parts.localizer import Localizer
+from graph.mergeability import mergeAnalysisFor
+
+
+class Localizer4(Localizer):
+    """
+    Pairwise merging: picks the two remaining candidates that merge soonest and replays the cached shortest
+    merging sequence of that pair until they coincide, then picks the next pair. The sequences come from
+    the ship's MergeAnalysis, so choosing a move is a table lookup and an episode on a synchronizing ship
+    takes at most (|L| - 1) * max merge distance steps.
+    """
+
+    def __init__(self, ship, position=None, possible_locations=None):
+        super().__init__(ship, position, possible_locations)
+        self.analysis = mergeAnalysisFor(self.possible_locations.table)
+        self.first_action = self.analysis.firstActions()
+        self.pair = None  # Dense indices of the two candidates being merged
+
+    def localize(self):
+        if self.isLocalized():
+            self.ship.game_over = True
+            print(f"Localized after {self.ship.t} moves at location {self.possible_locations}")
+            self.ship.step += 1
+            return
+
+        if self.pair is None:
+            self.pair = self._closestPair()
+
+        if self.pair is None:
+            # No two candidates can ever merge, move at random like the other strategies do when stuck
+            action = random.choice(self.actions)
+        else:
+            p, q = self.pair
+            action = self.actions[self.first_action[p, q]]
+            nxt = self.possible_locations.table.next[self.possible_locations.table.action_index[action]]
+            p, q = int(nxt[p]), int(nxt[q])
+            self.pair = None if p == q else (p, q)
+
+        self.possible_locations = self.possible_locations.move(action)
+        self.ship.t += 1
+
+    def replayed(self, before, after):
+        self.pair = None  # The merge word in progress no longer applies to the new belief
+        self.possible_locations = after
+
+    def _closestPair(self):
+        indices = self.possible_locations.indices()
+        distance = self.analysis.distance[np.ix_(indices, indices)]
+        distance = np.where(distance > 0, distance, np.iinfo(distance.dtype).max)
+        i, j = np.unravel_index(np.argmin(distance), distance.shape)
+        if distance[i, j] == np.iinfo(distance.dtype).max:
+            return None
+        return int(indices[i]), int(indices[j])
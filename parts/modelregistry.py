@@ -0,0 +1,20 @@
+import os
+from parts.costmodel import CostModel, loadCostModel
+
+_models = dict()  # absolute model path -> CostModel, loaded at most once per process
+
+
+def getModel(model_path: str) -> CostModel:
+    """Shared evaluator for a model artifact, callers must treat it as read-only"""
+    key = os.path.abspath(model_path)
+    model = _models.get(key)
+    if model is None:
+        model = loadCostModel(model_path)
+        _models[key] = model
+    return model
+
+
+def preloadModels(model_paths):
+    """multiprocessing.Pool initializer, warms the registry before the worker's first episode"""
+    for model_path in model_paths:
+        getModel(model_path)
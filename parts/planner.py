@@ -0,0 +1,134 @@
+import time
+import numpy as np
+import constants as cnt
+import helpers.profiler as profiler
+from parts.belief import BeliefSet
+from graph.mergeability import analysisCellLimit, mergeAnalysisFor
+
+
+class LookaheadPlanner:
+    """
+    Depth-k beam search over belief states for the greedy localizers.
+    Every level expands all beliefs of the beam by every action in one batch, scores the children with
+    depth + cost(|belief|) and keeps the beam_width best. The first action of the best sequence found is
+    returned. The node budget stops the search early, the best sequence so far is used then; it is what keeps a
+    seeded episode reproducible. The wall-clock budget is only a safety cap far above the usual cost of a step.
+
+    Beliefs of equal size are told apart by how soon their closest pair of cells can merge (MergeAnalysis),
+    a tie-break below one step, so the search heads for the next merge instead of wandering on a plateau.
+    Ships above analysisCellLimit() go without it.
+
+    Scores are kept in a transposition table keyed by the belief fingerprint (Zobrist hash), so beliefs
+    reached again by another sequence, in this search or a later step, are neither re-scored nor re-expanded.
+    Like VisitedStates, a fingerprint hit only counts once the packed bitset confirms it.
+    """
+
+    PAIR_LIMIT = 64  # Largest belief the closest-pair tie-break is computed for
+
+    def __init__(self, table, cost=None, depth: int = None, beam_width: int = None, node_budget: int = None,
+                 time_budget: float = None, table_limit: int = 200000):
+        self.table = table
+        self.analysis = mergeAnalysisFor(table) if table.size <= analysisCellLimit() else None
+        self.cost = cost if cost is not None else (lambda sizes: sizes.astype(np.float64))
+        self.depth = depth or getattr(cnt, 'LOOKAHEAD_DEPTH', 1)
+        self.beam_width = beam_width or getattr(cnt, 'LOOKAHEAD_BEAM', 8)
+        self.node_budget = node_budget or getattr(cnt, 'LOOKAHEAD_NODES', 2000)
+        self.time_budget = time_budget or getattr(cnt, 'LOOKAHEAD_SECONDS', 1.0)
+        self.table_limit = table_limit
+        self.scores = dict()  # Transposition table: fingerprint -> (packed key, cost with tie-break)
+        self.nodes = 0  # Nodes expanded by the last plan() call
+
+    def _children(self, masks):
+        """(actions, beliefs, cells) masks of every belief after every action"""
+        rows, cols = np.nonzero(masks)
+        children = np.zeros((len(self.table.actions),) + masks.shape, dtype=bool)
+        for a in range(len(self.table.actions)):
+            children[a, rows, self.table.next[a][cols]] = True
+        return children
+
+    def _fingerprints(self, masks):
+        return np.bitwise_xor.reduce(np.where(masks, self.table.zobrist, np.uint64(0)), axis=-1)
+
+    def _closestMerge(self, mask):
+        """Merge distance of the closest pair of the belief scaled below 1, 0 for large or unmergeable beliefs"""
+        indices = np.flatnonzero(mask)
+        if self.analysis is None or len(indices) < 2 or len(indices) > self.PAIR_LIMIT:
+            return 0.0
+        distance = self.analysis.distance[np.ix_(indices, indices)]
+        distance = distance[distance > 0]
+        return float(distance.min()) / (self.analysis.max_distance + 1) if len(distance) else 0.0
+
+    def _costs(self, masks, fingerprints, keys, sizes):
+        """Heuristic cost of every belief, through the transposition table"""
+        costs = np.empty(len(fingerprints), dtype=np.float64)
+        missing = []
+        for i, fingerprint in enumerate(fingerprints.tolist()):
+            known = self.scores.get(fingerprint)
+            if known is None or known[0] != keys[i]:
+                missing.append(i)  # A colliding belief is scored again and takes the slot over
+            else:
+                costs[i] = known[1]
+        if missing:
+            # One batched call for everything not seen before
+            costs[missing] = self.cost(sizes[missing])
+            for i in missing:
+                costs[i] += self._closestMerge(masks[i])
+            if len(self.scores) + len(missing) > self.table_limit:
+                self.scores.clear()
+            for i in missing:
+                self.scores[int(fingerprints[i])] = (keys[i], float(costs[i]))
+        costs[sizes == 1] = 0.0  # Localized, nothing left to do
+        return costs
+
+    def plan(self, belief, visited=None):
+        """Action (name) starting the best sequence from `belief`, None when every action is a dead end"""
+        start = time.perf_counter()
+        self.nodes = 0
+        root_fingerprint = belief.fingerprint()
+        beam = belief.mask[None, :]
+        beam_first = np.zeros(1, dtype=np.int64)  # First action of the sequence leading to each beam entry
+        reached = {root_fingerprint: belief.packedKey()}  # Fingerprint -> packed key of beliefs seen this search
+
+        best_action, best_score = None, np.inf
+        for depth in range(1, self.depth + 1):
+            if self.nodes + len(self.table.actions) * len(beam) > self.node_budget:
+                break
+            children = self._children(beam)
+            n_actions, n_beam, n_cells = children.shape
+            self.nodes += n_actions * n_beam
+            flat = children.reshape(-1, n_cells)
+            first = np.tile(beam_first, n_actions) if depth > 1 else np.repeat(np.arange(n_actions), n_beam)
+            fingerprints = self._fingerprints(flat)
+            packed = np.packbits(flat, axis=1)
+            keys = [row.tobytes() for row in packed]
+            sizes = np.count_nonzero(flat, axis=1)
+
+            keep = np.ones(len(flat), dtype=bool)
+            for i, fingerprint in enumerate(fingerprints.tolist()):
+                # Stalled moves, beliefs seen earlier in the episode and transpositions are dropped
+                if reached.get(fingerprint) == keys[i] or (depth == 1 and visited is not None
+                                                           and BeliefSet(self.table, flat[i]) in visited):
+                    keep[i] = False
+                else:
+                    reached.setdefault(fingerprint, keys[i])
+            if not keep.any():
+                break
+
+            flat, first, fingerprints, sizes = flat[keep], first[keep], fingerprints[keep], sizes[keep]
+            keys = [key for key, kept in zip(keys, keep.tolist()) if kept]
+            scores = depth + self._costs(flat, fingerprints, keys, sizes)
+            best = int(np.argmin(scores))
+            if scores[best] < best_score:
+                best_score, best_action = scores[best], int(first[best])
+            if sizes[best] == 1:
+                break  # Nothing deeper can beat localizing now
+
+            order = np.argsort(scores, kind='stable')[:self.beam_width]
+            beam, beam_first = flat[order], first[order]
+            if time.perf_counter() - start >= self.time_budget:
+                break  # Safety cap only, the node budget normally ends the search first
+
+        if profiler.ENABLED:
+            profiler.addTime("planner.plan", time.perf_counter() - start)
+            profiler.count("planner.nodes", self.nodes)
+        return None if best_action is None else self.table.actions[best_action]
@@ -0,0 +1,192 @@
+import os
+from collections import OrderedDict
+import numpy as np
+import constants as cnt
+import helpers.profiler as profiler
+from parts.localizer import Localizer
+from data.store import _atomicWrite
+
+
+class PolicyCache:
+    """
+    Belief -> (action index, steps left to localize, successor key) memo of one ship and strategy, filled from
+    localized episodes. Keys are BeliefSet.packedKey(), so two beliefs only share an entry when they are equal.
+    The successor is the key of the belief the action leads to, None when that belief is localized.
+
+    An entry is only replayed when its successor has fewer steps left (or no entry), see CachedLocalizer. After an
+    eviction (LRU, capacity) the successor of an entry may be re-recorded with more steps left; merge() and load()
+    leave out entries whose successor has no fewer steps left than they do, so a loaded cache never holds a loop.
+
+    Entries recorded since the last takePending() are kept aside, pool workers hand them to the parent,
+    which merges them into its own cache and saves it for the next run.
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or getattr(cnt, 'POLICY_CACHE_SIZE', 100000)
+        self.entries = OrderedDict()  # packed key -> (action index, remaining, successor), least recently used first
+        self.pending = dict()
+
+    def lookup(self, key: bytes):
+        """(action index, remaining, successor) stored for a packed belief key, or None"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            if profiler.ENABLED:
+                profiler.count("policy_cache.hits")
+        return entry
+
+    def peek(self, key: bytes):
+        """Like lookup(), without counting as a use"""
+        return self.entries.get(key)
+
+    def _put(self, key: bytes, action: int, remaining: int, successor: bytes = None) -> bool:
+        """Stores the entry unless a path at least as short is known, returns whether it was stored"""
+        known = self.entries.get(key)
+        if known is not None and known[1] <= remaining:
+            return False
+        self.entries[key] = (action, remaining, successor)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return True
+
+    def _progresses(self, remaining: int, successor: bytes) -> bool:
+        """Whether an entry with these steps left and successor key leads somewhere closer to localized"""
+        known = self.entries.get(successor) if successor is not None else None
+        return known is None or known[1] < remaining
+
+    def record(self, trajectory):
+        """
+        Learns a localized episode, trajectory is its (packed key, action index) pairs in order.
+        Walked backwards so every belief keeps the shortest path known, through this episode or an earlier one.
+        """
+        remaining = 0
+        successor = None
+        for key, action in reversed(trajectory):
+            remaining += 1
+            if self._put(key, action, remaining, successor):
+                self.pending[key] = (action, remaining, successor)
+            else:
+                remaining = self.entries[key][1]
+            successor = key
+
+    def takePending(self) -> list:
+        """(key, action, remaining, successor) learned since the previous call"""
+        learned = [(key, *entry) for key, entry in self.pending.items()]
+        self.pending = dict()
+        return learned
+
+    def merge(self, learned: list):
+        """Adds another cache's entries, successors first as takePending() lists them"""
+        for key, action, remaining, successor in learned:
+            if self._progresses(remaining, successor):
+                self._put(key, action, remaining, successor)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        keys = list(self.entries)
+        width = len(keys[0]) if keys else 1
+        values = np.array([entry[:2] for entry in self.entries.values()], dtype=np.int32).reshape(-1, 2)
+        successors = [entry[2] for entry in self.entries.values()]
+        _atomicWrite(path, lambda file: np.savez(
+            file,
+            keys=np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, width),
+            actions=values[:, 0].astype(np.int8),
+            remaining=values[:, 1],
+            successors=np.frombuffer(b"".join(s if s is not None else bytes(width) for s in successors),
+                                     dtype=np.uint8).reshape(-1, width),
+            localizes=np.array([s is None for s in successors], dtype=bool)))
+
+    @staticmethod
+    def load(path: str, capacity: int = None):
+        """Cache saved at path, an empty one if there is none yet or it predates successor keys"""
+        cache = PolicyCache(capacity)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if 'successors' not in data:
+                    return cache  # Its chains can't be checked, start over
+                for key, action, remaining, successor, localizes in zip(
+                        data['keys'], data['actions'].tolist(), data['remaining'].tolist(), data['successors'],
+                        data['localizes'].tolist()):
+                    cache._put(key.tobytes(), action, remaining, None if localizes else successor.tobytes())
+            # Entries are saved least recently used first, a successor may come after the entry leading to it
+            for key, (_, remaining, successor) in list(cache.entries.items()):
+                if not cache._progresses(remaining, successor):
+                    del cache.entries[key]
+        return cache
+
+
+def policyCachePath(ship_hash: str, strategy: int) -> str:
+    """File of the cache of one ship and strategy, planned strategies get one per lookahead depth"""
+    name = f"{ship_hash}-bot{strategy}"
+    if getattr(cnt, 'LOOKAHEAD_DEPTH', 1) > 1:
+        name += f"-depth{cnt.LOOKAHEAD_DEPTH}"
+    return os.path.join(getattr(cnt, 'POLICY_CACHE_DIR', "../data/policy"), name + ".npz")
+
+
+class CachedLocalizer(Localizer):
+    """
+    Runs another localizer through a PolicyCache: beliefs the cache knows replay the stored action, which the
+    strategy is told about through Localizer.replayed() so its per-episode state (visited beliefs, a merge word
+    in progress) stays in step. The other beliefs are left to the strategy, and so is a hit whose successor
+    doesn't have fewer steps left or whose belief this episode already went through. A localized episode is
+    recorded.
+    """
+
+    def __init__(self, inner: Localizer, cache: PolicyCache):
+        super().__init__(inner.ship, inner.position, inner.possible_locations)
+        self.inner = inner
+        self.cache = cache
+        self.table = self.possible_locations.table
+        self.trajectory = []  # (packed key, action index) of every move so far
+        self.seen = set()  # Packed keys of the trajectory
+
+    def localize(self):
+        if self.isLocalized():
+            self.ship.game_over = True
+            print(f"Localized after {self.ship.t} moves at location {self.possible_locations}")
+            self.ship.step += 1
+            self.cache.record(self.trajectory)
+            return
+
+        before = self.possible_locations
+        key = before.packedKey()
+        replay = self._replay(key, before)
+        if replay is not None:
+            action, after = replay
+            self.possible_locations = after
+            self.inner.replayed(before, after)
+            self.ship.t += 1
+        else:
+            self.inner.possible_locations = before
+            self.inner.localize()
+            self.possible_locations = self.inner.possible_locations
+            action = self._actionBetween(before, self.possible_locations)
+        self.trajectory.append((key, action))
+        self.seen.add(key)
+
+        if self.ship.game_over:  # Strategies that check after moving (Localizer1) end the episode themselves
+            self.cache.record(self.trajectory)
+
+    def _replay(self, key: bytes, before):
+        """(action index, belief) the cache replays from `before`, None when it has nothing that makes progress"""
+        if key in self.seen:
+            return None
+        entry = self.cache.lookup(key)
+        if entry is None:
+            return None
+        after = before.move(self.table.actions[entry[0]])
+        if len(after) > 1:
+            successor = self.cache.peek(after.packedKey())
+            if successor is not None and successor[1] >= entry[1]:
+                return None
+        return entry[0], after
+
+    def _actionBetween(self, before, after) -> int:
+        """Index of an action taking `before` to `after`, the strategies don't report which one they took"""
+        for a, action in enumerate(self.table.actions):
+            if before.move(action) == after:
+                return a
+        raise ValueError("Localizer moved to a belief no single action reaches")